@@ -5,21 +5,665 @@ API 健康度檢測腳本 - 第二階段
 從第一階段的 JSON 記錄檔讀取 API 呼叫資訊，批次執行並驗證結果
 """
 
+import asyncio
+import base64
+import codecs
+import copy
+import hashlib
+import heapq
 import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import socket
+import sqlite3
+import subprocess
 import requests
+import tempfile
 import time
 import urllib3
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Iterator, List, Any, Optional
 from dataclasses import dataclass, field
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 import threading
 
+try:
+    import aiohttp
+except ImportError:  # 非同步引擎為選用功能，未安裝時僅能使用執行緒模式
+    aiohttp = None
+
+try:
+    import ijson
+except ImportError:  # 串流解析 .json 記錄檔為選用功能，未安裝時整檔載入
+    ijson = None
+
 # 禁用 SSL 警告（測試環境可能使用自簽憑證）
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
+@dataclass
+class ProbeTimings:
+    """單一 API 呼叫的分段耗時 (ms，以單調時鐘量測；重用連線時 DNS/連線/TLS 為 0)"""
+    dns_ms: float = 0.0
+    connect_ms: float = 0.0
+    tls_ms: float = 0.0
+    ttfb_ms: float = 0.0   # 送出請求到收到回應標頭 (伺服器處理 + 網路往返)
+    body_ms: float = 0.0   # 下載回應本體
+
+
+# 每個執行緒目前進行中請求的連線階段時間記錄
+_phase_local = threading.local()
+
+
+def _record_phase(name: str, elapsed_ms: float):
+    """將連線階段耗時記錄到目前執行緒的請求上"""
+    phases = getattr(_phase_local, "phases", None)
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + elapsed_ms
+
+
+class _TimedConnectionMixin:
+    """分開量測 DNS 解析與 TCP 連線時間的 urllib3 連線"""
+
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            # 與 urllib3 的 create_connection 相同，依 allowed_gai_family() 決定解析 IPv4/IPv6
+            infos = socket.getaddrinfo(host.strip("[]"), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+            addresses = list(dict.fromkeys(info[4][0] for info in infos)) or [host]
+        except (OSError, UnicodeError):
+            addresses = [host]  # 交由 urllib3 回報解析錯誤
+        _record_phase("dns_ms", (time.perf_counter() - start) * 1000)
+
+        # 依序嘗試每個解析出的位址 (例如 IPv6 不通時改連 IPv4)，連線時間包含失敗的嘗試
+        start = time.perf_counter()
+        try:
+            for index, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError):
+                    if index == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+            _record_phase("connect_ms", (time.perf_counter() - start) * 1000)
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        phases = getattr(_phase_local, "phases", None)
+        before = dict(phases) if phases is not None else {}
+        start = time.perf_counter()
+        super().connect()
+        if phases is not None:
+            # connect() = DNS + TCP 連線 + TLS 握手，扣除前兩者即為 TLS
+            socket_ms = (phases.get("dns_ms", 0.0) - before.get("dns_ms", 0.0)
+                         + phases.get("connect_ms", 0.0) - before.get("connect_ms", 0.0))
+            _record_phase("tls_ms", max(0.0, (time.perf_counter() - start) * 1000 - socket_ms))
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """建立可量測連線階段耗時之連線池的 HTTPAdapter"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+# 不屬於回應結構、驗證時忽略的 actualResponse 欄位
+IGNORED_RESPONSE_KEYS = ("note", "items")
+
+
+class _TopLevelKeyScanner:
+    """以常數記憶體逐段掃描 JSON 物件的頂層欄位名稱，找齊所需欄位即停止"""
+
+    MAX_KEY_LENGTH = 256
+
+    def __init__(self, wanted: set):
+        self.wanted = set(wanted)
+        self.found = set()
+        self.is_object: Optional[bool] = None
+        self.complete = not self.wanted
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_chars: Optional[List[str]] = None
+        self._pending_key: Optional[str] = None
+
+    def feed(self, chunk: bytes):
+        if self.complete:
+            return
+        for ch in self._decoder.decode(chunk):
+            if self.is_object is None:
+                if ch.isspace() or ch == "\ufeff":
+                    continue
+                self.is_object = ch == "{"
+                if not self.is_object:
+                    self.complete = True
+                    return
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                    continue
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_chars is not None:
+                        self._pending_key = "".join(self._key_chars)
+                        self._key_chars = None
+                    continue
+                if self._key_chars is not None and len(self._key_chars) < self.MAX_KEY_LENGTH:
+                    self._key_chars.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_chars = []
+            elif ch in "{[":
+                self._depth += 1
+                self._expect_key = self._depth == 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.complete = True
+                    return
+            elif self._depth == 1:
+                if ch == ":" and self._pending_key is not None:
+                    self.found.add(self._pending_key)
+                    self._pending_key = None
+                    self._expect_key = False
+                    if self.wanted <= self.found:
+                        self.complete = True
+                        return
+                elif ch == ",":
+                    self._expect_key = True
+
+    def top_level_keys(self) -> Optional[set]:
+        """已確定的頂層欄位；尚未掃描完整 (如被截斷) 時回傳 None"""
+        if not self.complete or not self.is_object:
+            return None
+        return self.found
+
+
+class ResponseDigest:
+    """逐段累計回應本體的大小與 SHA-256，不保留本體內容"""
+
+    def __init__(self, max_bytes: int, expected_keys: set):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.truncated = False
+        self._hash = hashlib.sha256()
+        self._scanner = _TopLevelKeyScanner(expected_keys)
+
+    def feed(self, chunk: bytes) -> bool:
+        """加入一段本體，超過上限時回傳 False 表示應停止讀取"""
+        if self.max_bytes and self.size + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.size]
+            self.truncated = True
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        self._scanner.feed(chunk)
+        return not self.truncated
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def top_level_keys(self) -> Optional[set]:
+        return self._scanner.top_level_keys()
+
+
+# 請求參數中代表「登入使用者員工代碼」的動態標記
+EMP_CODE_PLACEHOLDER = "***USE_LOGGED_IN_USER_EMP_CODE***"
+
+# 欄位名稱包含以下字串時於報告中遮蔽
+SENSITIVE_KEY_PARTS = ("password", "Password", "token", "Token", "secret", "Secret", "key", "Key")
+
+
+def _find_placeholder_paths(params: Dict, path: tuple = ()) -> List[tuple]:
+    """找出參數樹中所有員工代碼標記的路徑 (dict 與 list 中的值)"""
+    paths = []
+    for key, value in params.items():
+        if isinstance(value, str):
+            if value == EMP_CODE_PLACEHOLDER:
+                paths.append(path + (key,))
+        elif isinstance(value, dict):
+            paths.extend(_find_placeholder_paths(value, path + (key,)))
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                if isinstance(item, dict):
+                    paths.extend(_find_placeholder_paths(item, path + (key, index)))
+                elif item == EMP_CODE_PLACEHOLDER:
+                    paths.append(path + (key, index))
+    return paths
+
+
+def _find_sensitive_paths(params: Dict, path: tuple = ()) -> List[tuple]:
+    """找出參數樹中需遮蔽欄位的路徑 (僅往下走訪 dict)"""
+    paths = []
+    for key, value in params.items():
+        if any(part in key for part in SENSITIVE_KEY_PARTS):
+            paths.append(path + (key,))
+        elif isinstance(value, dict):
+            paths.extend(_find_sensitive_paths(value, path + (key,)))
+    return paths
+
+
+def _assign_path(root: Any, path: tuple, value: Any):
+    """依路徑設定巢狀 dict/list 中的值"""
+    for step in path[:-1]:
+        root = root[step]
+    root[path[-1]] = value
+
+
+# 推斷出的回應結構中，每個陣列最多驗證的元素數
+SCHEMA_MAX_ARRAY_ITEMS = 50
+
+# 單次驗證最多回報的結構錯誤數
+SCHEMA_MAX_ERRORS = 5
+
+
+def infer_schema(value: Any) -> Dict:
+    """由錄製的回應範例推斷結構：型別、巢狀物件與陣列元素形狀"""
+    if isinstance(value, bool):
+        return {"type": "boolean"}
+    if isinstance(value, (int, float)):
+        return {"type": "number"}
+    if isinstance(value, str):
+        return {"type": "string"}
+    if isinstance(value, dict):
+        return {
+            "type": "object",
+            "properties": {key: infer_schema(item) for key, item in value.items()},
+            "required": [key for key, item in value.items() if item is not None],
+        }
+    if isinstance(value, list):
+        items = None
+        for element in value:
+            element_schema = infer_schema(element)
+            items = element_schema if items is None else _merge_schemas(items, element_schema)
+        return {"type": "array", "items": items}
+    # null 無法得知實際型別，不做限制
+    return {"type": "any"}
+
+
+def _merge_schemas(left: Dict, right: Dict) -> Dict:
+    """合併陣列中不同元素的結構：物件取欄位聯集、必要欄位取交集，型別不一致則不限制"""
+    if left["type"] == "any" or right["type"] == "any" or left["type"] != right["type"]:
+        return {"type": "any"}
+    if left["type"] == "object":
+        properties = dict(left["properties"])
+        for key, schema in right["properties"].items():
+            properties[key] = _merge_schemas(properties[key], schema) if key in properties else schema
+        required = [key for key in left["required"] if key in right["required"]]
+        return {"type": "object", "properties": properties, "required": required}
+    if left["type"] == "array":
+        if left["items"] is None or right["items"] is None:
+            return {"type": "array", "items": left["items"] or right["items"]}
+        return {"type": "array", "items": _merge_schemas(left["items"], right["items"])}
+    return left
+
+
+_SCHEMA_TYPE_CHECKS = {
+    "boolean": lambda v: isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "string": lambda v: isinstance(v, str),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+}
+
+_JSON_TYPE_NAMES = {bool: "boolean", int: "number", float: "number", str: "string",
+                    dict: "object", list: "array", type(None): "null"}
+
+
+def compile_schema(schema: Dict, check_root_required: bool = False):
+    """將結構編譯為驗證函式 validator(value) -> 錯誤訊息清單
+
+    根物件的必要欄位預設不檢查 (已由 ProbePlan.expected_keys 檢查)。
+    """
+
+    def build(node: Dict, check_required: bool):
+        node_type = node["type"]
+        if node_type == "any":
+            return None
+
+        type_check = _SCHEMA_TYPE_CHECKS[node_type]
+        children = []
+        element_check = None
+        required = ()
+        if node_type == "object":
+            required = tuple(node["required"]) if check_required else ()
+            children = [
+                (key, child) for key, child in
+                ((key, build(child_schema, True)) for key, child_schema in node["properties"].items())
+                if child is not None
+            ]
+        elif node_type == "array" and node["items"] is not None:
+            element_check = build(node["items"], True)
+
+        def check(value, path: str, errors: List[str]):
+            if value is None:
+                return  # null 一律接受 (錄製時可能有值、執行時為空)
+            if not type_check(value):
+                errors.append(f"響應結構不符: {path} 預期 {node_type}，"
+                              f"實際為 {_JSON_TYPE_NAMES.get(type(value), type(value).__name__)}")
+                return
+            for key in required:
+                if key not in value:
+                    errors.append(f"響應缺少欄位: {path}.{key}")
+            for key, child in children:
+                if len(errors) >= SCHEMA_MAX_ERRORS:
+                    return
+                if key in value:
+                    child(value[key], f"{path}.{key}", errors)
+            if element_check is not None:
+                for index, element in enumerate(value[:SCHEMA_MAX_ARRAY_ITEMS]):
+                    if len(errors) >= SCHEMA_MAX_ERRORS:
+                        return
+                    element_check(element, f"{path}[{index}]", errors)
+
+        return check
+
+    root = build(schema, check_root_required)
+    if root is None:
+        return None
+
+    def validator(value: Any) -> List[str]:
+        errors: List[str] = []
+        root(value, "$", errors)
+        return errors[:SCHEMA_MAX_ERRORS]
+
+    return validator
+
+
+def _atomic_write_json(path: str, data: Any, mode: int = 0o600, **dump_kwargs):
+    """以同目錄下的唯一暫存檔寫出 JSON 後原子替換，多個寫入者同時存檔也不會互相刪除暫存檔
+
+    mkstemp 建立的暫存檔權限為 0600；需要給其他使用者 (如網頁伺服器) 讀取的檔案請指定 mode。
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, **dump_kwargs)
+        if mode != 0o600:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class SchemaCache:
+    """依記錄項目內容雜湊快取推斷出的回應結構 (JSON 檔)，記錄未變更時不必重新推斷
+
+    多個測試器可共用同一個快取檔：存檔時與檔案內容合併，超過 max_age_days 未使用的項目一併移除。
+    """
+
+    _file_lock = threading.Lock()  # 多目標模式下多個測試器共用同一個快取檔
+
+    # 最後使用時間只在超過此秒數時更新，避免每次執行都得重寫整個快取檔
+    TOUCH_INTERVAL_SECONDS = 86400
+
+    def __init__(self, cache_path: Optional[str], max_age_days: float = 30):
+        self.cache_path = cache_path
+        self.max_age_seconds = max_age_days * 86400
+        self._entries: Dict[str, Dict] = self._read()
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Dict]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}  # 快取損毀時重建
+        if not isinstance(data, dict):
+            return {}
+        if "entries" not in data:
+            # 舊格式 (雜湊 -> 結構)：視為剛使用過
+            now = int(time.time())
+            return {key: {"schema": schema, "lastUsed": now} for key, schema in data.items()}
+        return data["entries"]
+
+    @staticmethod
+    def entry_hash(api_info: Dict) -> str:
+        canonical = json.dumps(api_info, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def schema_for(self, api_info: Dict, key: Optional[str] = None) -> Optional[Dict]:
+        """取得記錄項目的回應結構；僅 full_call 且錄有物件回應時才有結構"""
+        expected_response = api_info.get("actualResponse")
+        if api_info.get("testStrategy", "full_call") != "full_call" or not isinstance(expected_response, dict):
+            return None
+
+        key = key or self.entry_hash(api_info)
+        now = int(time.time())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry.get("lastUsed", 0) >= self.TOUCH_INTERVAL_SECONDS:
+                    entry["lastUsed"] = now
+                    self._dirty.add(key)
+                return entry.get("schema")
+
+        sample = {k: v for k, v in expected_response.items() if k != "note"}
+        schema = infer_schema(sample) if sample else None
+        with self._lock:
+            self._entries[key] = {"schema": schema, "lastUsed": now}
+            self._dirty.add(key)
+        return schema
+
+    def save(self):
+        """寫回本測試器新增或更新的項目 (與檔案中其他測試器的項目合併)，並移除久未使用的項目"""
+        if not self.cache_path:
+            return
+        with SchemaCache._file_lock, self._lock:
+            if not self._dirty:
+                return
+            entries = self._read()
+            for key in self._dirty:
+                entries[key] = self._entries[key]
+            cutoff = time.time() - self.max_age_seconds
+            entries = {key: entry for key, entry in entries.items() if entry.get("lastUsed", 0) >= cutoff}
+            _atomic_write_json(self.cache_path, {"entries": entries}, mode=0o644, separators=(",", ":"))
+            self._dirty.clear()
+
+
+class ProbePlan:
+    """由記錄項目編譯出的不可變探測計畫
+
+    動態標記與需遮蔽欄位的路徑、預期的回應欄位與結構驗證函式都在編譯時算好，
+    每次呼叫只需依路徑代入值，不再走訪整棵參數樹。
+    """
+
+    __slots__ = (
+        "endpoint", "full_url", "method", "expected_status", "test_strategy",
+        "expected_keys", "params_template", "placeholder_paths", "sensitive_paths",
+        "has_password", "interval_seconds", "response_schema", "schema_validator",
+        "fingerprint", "entry_hash", "_bound",
+    )
+
+    def __init__(self, api_info: Dict, default_interval: Optional[float] = None,
+                 response_schema: Optional[Dict] = None, entry_hash: str = ""):
+        params = api_info.get("requestParams") or {}
+        expected_response = api_info.get("actualResponse", {})
+        # 保留記錄中的欄位順序，讓驗證訊息的順序穩定
+        expected_keys = tuple(
+            key for key in expected_response if key not in IGNORED_RESPONSE_KEYS
+        ) if isinstance(expected_response, dict) else ()
+
+        set_field = super().__setattr__
+        set_field("endpoint", api_info.get("endpoint", ""))
+        set_field("full_url", api_info.get("fullUrl", ""))
+        set_field("method", api_info.get("method", "GET").upper())
+        set_field("expected_status", api_info.get("expectedStatus", 200))
+        set_field("test_strategy", api_info.get("testStrategy", "full_call"))
+        set_field("expected_keys", expected_keys)
+        set_field("params_template", copy.deepcopy(params))
+        set_field("placeholder_paths", tuple(_find_placeholder_paths(params)))
+        set_field("sensitive_paths", tuple(_find_sensitive_paths(params)))
+        set_field("has_password", "Password" in params)
+        # 常駐模式的探測間隔 (秒)；未設定時沿用頁面流程或全域預設值
+        set_field("interval_seconds", api_info.get("intervalSeconds", default_interval))
+        set_field("response_schema", response_schema)
+        set_field("schema_validator", compile_schema(response_schema) if response_schema else None)
+        # 請求識別 (方法 + URL + 正規化參數) 與整個記錄項目的內容雜湊
+        canonical_request = json.dumps([self.method, self.full_url, params],
+                                       sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        set_field("fingerprint", hashlib.sha256(canonical_request.encode("utf-8")).hexdigest())
+        set_field("entry_hash", entry_hash)
+        set_field("_bound", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ProbePlan 為不可變物件")
+
+    def __getstate__(self):
+        # 供多行程模式傳遞計畫；綁定快取與驗證函式不隨之傳遞，於接收端重建
+        return {name: getattr(self, name) for name in self.__slots__
+                if name not in ("_bound", "schema_validator")}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            super().__setattr__(name, value)
+        schema = state.get("response_schema")
+        super().__setattr__("schema_validator", compile_schema(schema) if schema else None)
+        super().__setattr__("_bound", None)
+
+    def bind(self, emp_code: str, password: str) -> tuple:
+        """代入登入資訊，回傳 (請求參數, 報告用的遮蔽參數)；同一組登入資訊只計算一次"""
+        bound = self._bound
+        if bound is not None and bound[0] == (emp_code, password):
+            return bound[1], bound[2]
+
+        request_params = self.params_template
+        if self.placeholder_paths or self.has_password:
+            request_params = copy.deepcopy(request_params)
+            for path in self.placeholder_paths:
+                _assign_path(request_params, path, emp_code)
+            if self.has_password:
+                request_params["Password"] = password
+
+        safe_params = request_params
+        if self.sensitive_paths:
+            safe_params = copy.deepcopy(request_params)
+            for path in self.sensitive_paths:
+                _assign_path(safe_params, path, "***MASKED***")
+
+        # 請求參數與遮蔽參數在各次呼叫間共用，呼叫端不得修改
+        super().__setattr__("_bound", ((emp_code, password), request_params, safe_params))
+        return request_params, safe_params
+
+
+class LatencyHistogram:
+    """對數分桶的延遲直方圖 (HDR 風格)：固定相對誤差、記憶體與樣本數無關、可合併"""
+
+    MIN_VALUE_MS = 0.01
+    PRECISION = 0.02  # 每個桶的相對寬度，百分位數誤差約 ±1%
+
+    _LOG_BASE = math.log1p(PRECISION)
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.min_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, value_ms: float, count: int = 1):
+        index = self._index(value_ms)
+        self.counts[index] = self.counts.get(index, 0) + count
+        if self.total == 0 or value_ms < self.min_ms:
+            self.min_ms = value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+        self.total += count
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.total == 0:
+            return
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.min_ms = other.min_ms if self.total == 0 else min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.total += other.total
+
+    def percentile(self, pct: float) -> float:
+        """取得百分位數 (0-100)，回傳所在桶的代表值並限制在 [min, max] 內"""
+        if self.total == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.total * pct / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(max(self._value(index), self.min_ms), self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        return {
+            "counts": {str(k): v for k, v in self.counts.items()},
+            "total": self.total,
+            "minMs": self.min_ms,
+            "maxMs": self.max_ms,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.counts = {int(k): v for k, v in data.get("counts", {}).items()}
+        histogram.total = data.get("total", 0)
+        histogram.min_ms = data.get("minMs", 0.0)
+        histogram.max_ms = data.get("maxMs", 0.0)
+        return histogram
+
+    @classmethod
+    def _index(cls, value_ms: float) -> int:
+        return math.ceil(math.log(max(value_ms, cls.MIN_VALUE_MS) / cls.MIN_VALUE_MS) / cls._LOG_BASE)
+
+    @classmethod
+    def _value(cls, index: int) -> float:
+        # 取桶的幾何中點
+        return cls.MIN_VALUE_MS * math.exp((index - 0.5) * cls._LOG_BASE)
+
+
 @dataclass
 class ApiTestResult:
     """單一 API 測試結果"""
@@ -34,6 +678,21 @@ class ApiTestResult:
     error_message: str = ""
     validation_errors: List[str] = field(default_factory=list)
     request_params: Dict = field(default_factory=dict)
+    timings: ProbeTimings = field(default_factory=ProbeTimings)
+    response_size: int = 0
+    response_sha256: str = ""
+    response_truncated: bool = False
+    page_flow: str = ""
+    fingerprint: str = ""
+    attempts: int = 1
+    short_circuited: bool = False
+    budget_exhausted: bool = False
+    coalesced: bool = False  # 沿用其他頁面流程中相同請求的結果
+
+    @property
+    def not_probed(self) -> bool:
+        """因主機斷路或時間預算用盡而未實際送出請求"""
+        return self.short_circuited or self.budget_exhausted
 
 
 @dataclass
@@ -45,27 +704,971 @@ class HealthReport:
     success_count: int = 0
     failure_count: int = 0
     avg_response_time_ms: float = 0.0
-    health_score: float = 0.0
+    health_score: Optional[float] = 0.0  # 沒有任何實際送出的請求時為 None (未知)
     results: List[ApiTestResult] = field(default_factory=list)
     critical_failures: List[str] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
+    connections_warmed: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    incremental_skipped: int = 0
+    # 相同請求合併：實際送出的探測數與各頁面流程引用的總數
+    unique_probes: int = 0
+    referenced_probes: int = 0
+    # 重試、斷路與時間預算統計
+    retried_count: int = 0
+    retry_attempts: int = 0
+    short_circuited_count: int = 0
+    budget_skipped_count: int = 0
+    not_probed_count: int = 0  # 未實際送出請求的結果數 (含合併請求的複本)，不計入成功/失敗
+    open_circuits: List[str] = field(default_factory=list)
+    concurrency_limit: Optional[int] = None
+    # 相對歷史基準顯著變慢的端點
+    performance_regressions: List[Dict] = field(default_factory=list)
+    # 串流延遲直方圖：整體、各頁面流程、各端點
+    latency_histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    flow_histograms: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    endpoint_histograms: Dict[str, LatencyHistogram] = field(default_factory=dict)
+
+
+class ResultStore:
+    """以 SQLite 保存歷次探測結果 (僅附加)，並隨寫入維護每小時/每日的端點彙總"""
+
+    GRANULARITIES = {"hour": 3600, "day": 86400}
+
+    def __init__(self, db_path: str, batch_size: int = 500):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._pending: List[tuple] = []
+        self._endpoint_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS endpoints (
+                id INTEGER PRIMARY KEY,
+                endpoint TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS probes (
+                ts INTEGER NOT NULL,
+                endpoint_id INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                latency_ms REAL NOT NULL,
+                success INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_probes_endpoint_ts ON probes (endpoint_id, ts);
+            CREATE TABLE IF NOT EXISTS rollups (
+                granularity TEXT NOT NULL,
+                bucket_start INTEGER NOT NULL,
+                endpoint_id INTEGER NOT NULL,
+                probe_count INTEGER NOT NULL,
+                error_count INTEGER NOT NULL,
+                histogram TEXT NOT NULL,
+                PRIMARY KEY (granularity, bucket_start, endpoint_id)
+            ) WITHOUT ROWID;
+        """)
+        for endpoint_id, endpoint in self._conn.execute("SELECT id, endpoint FROM endpoints"):
+            self._endpoint_ids[endpoint] = endpoint_id
+
+    def append(self, result: ApiTestResult, timestamp: Optional[float] = None):
+        """加入一筆結果；累積到 batch_size 筆時批次寫入 (未實際送出的請求不寫入)"""
+        if result.not_probed:
+            return
+        ts = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            self._pending.append((
+                int(ts * 1000), result.endpoint, result.actual_status,
+                result.response_time_ms, 1 if result.is_success else 0
+            ))
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def append_report(self, report: HealthReport):
+        """將整份報告的結果以報告的測試時間寫入 (合併請求的複本不重複寫入)"""
+        ts = datetime.fromisoformat(report.test_date).timestamp()
+        for result in report.results:
+            if not result.coalesced:
+                self.append(result, ts)
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+
+        with self._conn:
+            probe_rows = [
+                (ts, self._endpoint_id(endpoint), status, latency_ms, success)
+                for ts, endpoint, status, latency_ms, success in rows
+            ]
+            self._conn.executemany(
+                "INSERT INTO probes (ts, endpoint_id, status, latency_ms, success) VALUES (?, ?, ?, ?, ?)",
+                probe_rows
+            )
+
+            # 先在記憶體中依 (粒度, 時段, 端點) 彙總本批資料，再與既有彙總合併
+            batch: Dict[tuple, list] = {}
+            for ts, endpoint_id, _, latency_ms, success in probe_rows:
+                for granularity, seconds in self.GRANULARITIES.items():
+                    bucket_start = ts // 1000 // seconds * seconds
+                    entry = batch.setdefault((granularity, bucket_start, endpoint_id), [0, 0, LatencyHistogram()])
+                    entry[0] += 1
+                    entry[1] += 0 if success else 1
+                    entry[2].record(latency_ms)
+
+            for (granularity, bucket_start, endpoint_id), (count, errors, histogram) in batch.items():
+                existing = self._conn.execute(
+                    "SELECT probe_count, error_count, histogram FROM rollups "
+                    "WHERE granularity = ? AND bucket_start = ? AND endpoint_id = ?",
+                    (granularity, bucket_start, endpoint_id)
+                ).fetchone()
+                if existing:
+                    count += existing[0]
+                    errors += existing[1]
+                    histogram.merge(LatencyHistogram.from_dict(json.loads(existing[2])))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?)",
+                    (granularity, bucket_start, endpoint_id, count, errors, json.dumps(histogram.to_dict()))
+                )
+
+    def _endpoint_id(self, endpoint: str) -> int:
+        endpoint_id = self._endpoint_ids.get(endpoint)
+        if endpoint_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO endpoints (endpoint) VALUES (?)", (endpoint,))
+            endpoint_id = self._conn.execute(
+                "SELECT id FROM endpoints WHERE endpoint = ?", (endpoint,)
+            ).fetchone()[0]
+            self._endpoint_ids[endpoint] = endpoint_id
+        return endpoint_id
+
+    def query_rollups(self, granularity: str = "day", since: Optional[float] = None,
+                      endpoint: Optional[str] = None) -> List[Dict]:
+        """查詢彙總資料 (p50/p95/p99 與錯誤率)，不需掃描原始探測紀錄"""
+        self.flush()
+        sql = ("SELECT r.bucket_start, e.endpoint, r.probe_count, r.error_count, r.histogram "
+               "FROM rollups r JOIN endpoints e ON e.id = r.endpoint_id WHERE r.granularity = ?")
+        params: List[Any] = [granularity]
+        if since is not None:
+            sql += " AND r.bucket_start >= ?"
+            params.append(int(since))
+        if endpoint is not None:
+            sql += " AND e.endpoint = ?"
+            params.append(endpoint)
+        sql += " ORDER BY r.bucket_start, e.endpoint"
+
+        rollups = []
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        for bucket_start, endpoint_name, count, errors, histogram_json in rows:
+            histogram = LatencyHistogram.from_dict(json.loads(histogram_json))
+            rollups.append({
+                "bucketStart": datetime.fromtimestamp(bucket_start, timezone.utc).isoformat(),  # 時段以 UTC 對齊
+                "endpoint": endpoint_name,
+                "probeCount": count,
+                "errorRate": round(errors / count, 4) if count else 0.0,
+                "p50Ms": round(histogram.percentile(50), 2),
+                "p95Ms": round(histogram.percentile(95), 2),
+                "p99Ms": round(histogram.percentile(99), 2),
+                "maxMs": round(histogram.max_ms, 2),
+            })
+        return rollups
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+class ResultStreamWriter:
+    """執行中逐筆寫出測試結果 (NDJSON)，同時累計儀表板用的摘要索引
+
+    摘要索引包含各頁面流程與各狀態碼的計數、最慢的 N 個端點，以及每頁結果在 NDJSON
+    中的位元組範圍，讓儀表板先載入小型摘要，再以 Range 請求分頁載入詳細結果。
+    """
+
+    def __init__(self, results_path: str, summary_path: str, page_size: int = 200, slowest_count: int = 20):
+        self.results_path = results_path
+        self.summary_path = summary_path
+        self.page_size = page_size
+        self.slowest_count = slowest_count
+        self.count = 0
+        self.flow_counts: Dict[str, Dict[str, int]] = {}
+        self.status_counts: Dict[str, int] = {}
+        self._slowest: List[tuple] = []  # 最小堆積 (回應時間, 序號, 摘要)
+        self._page_offsets: List[int] = []
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._file = open(results_path, "wb")
+
+    def write(self, result: ApiTestResult):
+        """寫出一筆結果並更新計數 (執行緒安全)"""
+        line = (json.dumps(ApiHealthTester._result_to_dict(result), ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self.count % self.page_size == 0:
+                self._page_offsets.append(self._offset)
+                self._file.flush()  # 每頁刷新一次，執行中即可讀取已完成的頁面
+            self._file.write(line)
+            self._offset += len(line)
+            self.count += 1
+
+            counts = self.flow_counts.setdefault(result.page_flow,
+                                                 {"total": 0, "success": 0, "failure": 0, "notProbed": 0})
+            counts["total"] += 1
+            if result.not_probed:
+                counts["notProbed"] += 1
+            else:
+                counts["success" if result.is_success else "failure"] += 1
+                status = str(result.actual_status)
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+            entry = (result.response_time_ms, self.count, {
+                "endpoint": result.endpoint,
+                "method": result.method,
+                "pageFlow": result.page_flow,
+                "actualStatus": result.actual_status,
+                "isSuccess": result.is_success,
+                "responseTimeMs": round(result.response_time_ms, 2)
+            })
+            if len(self._slowest) < self.slowest_count:
+                heapq.heappush(self._slowest, entry)
+            elif entry[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def close(self, report_data: Dict, max_alerts: int = 100):
+        """關閉 NDJSON 並寫出摘要索引 (report_data 為不含詳細結果的報告)"""
+        with self._lock:
+            self._file.close()
+            boundaries = self._page_offsets + [self._offset]
+            pages = [{"offset": start, "bytes": end - start} for start, end in zip(boundaries, boundaries[1:])]
+            critical_failures = report_data.get("criticalFailures", [])
+            warnings = report_data.get("warnings", [])
+            index = {
+                **{k: v for k, v in report_data.items() if k not in ("criticalFailures", "warnings")},
+                "criticalFailures": critical_failures[:max_alerts],
+                "criticalFailureCount": len(critical_failures),
+                "warnings": warnings[:max_alerts],
+                "warningCount": len(warnings),
+                "flowCounts": self.flow_counts,
+                "statusCounts": self.status_counts,
+                "slowest": [item for _, _, item in sorted(self._slowest, key=lambda e: (-e[0], e[1]))],
+                "results": {
+                    "file": os.path.basename(self.results_path),
+                    "count": self.count,
+                    "pageSize": self.page_size,
+                    "pages": pages
+                }
+            }
+
+        _atomic_write_json(self.summary_path, index, mode=0o644)
+
+
+class ConcurrencyGate:
+    """跨多個測試器共用的並行上限：全域上限 + 各主機上限"""
+
+    def __init__(self, global_limit: int, per_host_limit: int, host_limits: Optional[Dict[str, int]] = None):
+        self._global = threading.BoundedSemaphore(global_limit)
+        self.per_host_limit = per_host_limit
+        self.host_limits = host_limits or {}
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            semaphore = self._hosts.get(host)
+            if semaphore is None:
+                limit = self.host_limits.get(host, self.per_host_limit)
+                semaphore = self._hosts[host] = threading.BoundedSemaphore(limit)
+            return semaphore
+
+    def acquire(self, url: str):
+        # 先取主機名額再取全域名額，等待主機名額時不佔用全域名額
+        self._host_semaphore(url).acquire()
+        self._global.acquire()
+
+    def release(self, url: str):
+        self._global.release()
+        self._host_semaphore(url).release()
+
+
+class RateLimiter:
+    """執行緒安全的權杖桶限速器 (每秒 rate 個請求)"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate / 10)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """取得一個權杖；超過 deadline (monotonic 秒) 仍無法取得時回傳 False"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """各主機的斷路器：連續失敗的端點數達門檻即開路並快速失敗，冷卻後放行一個試探請求 (半開)
+
+    同一端點重複失敗只算一次，避免單一端點的應用程式錯誤讓整台主機被判定為故障。
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures: Dict[str, set] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing: set = set()
+        self._lock = threading.Lock()
+
+    def allow(self, host: str) -> bool:
+        """是否允許對主機送出請求；開路冷卻期滿後只放行一個試探請求"""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if host in self._probing or time.monotonic() - opened_at < self.reset_timeout:
+                return False
+            self._probing.add(host)
+            return True
+
+    def record(self, host: str, healthy: bool, endpoint: str = ""):
+        """記錄一次探測結果 (endpoint 為端點識別)；試探失敗會重新開路"""
+        with self._lock:
+            self._probing.discard(host)
+            if healthy:
+                self._failures.pop(host, None)
+                self._opened_at.pop(host, None)
+                return
+            failures = self._failures.setdefault(host, set())
+            failures.add(endpoint)
+            if len(failures) >= self.failure_threshold or host in self._opened_at:
+                self._opened_at[host] = time.monotonic()
+
+    def abandon(self, host: str):
+        """放行後未實際送出請求 (如逾時間預算)，歸還半開試探名額"""
+        with self._lock:
+            self._probing.discard(host)
+
+    def open_hosts(self) -> List[str]:
+        with self._lock:
+            return sorted(self._opened_at)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD 自適應並行上限
+
+    正常回應時上限緩慢增加 (每完成約一輪請求 +1)；遇到 429/5xx/連線錯誤，或回應時間
+    相對各端點自身最快紀錄明顯上升時，上限減半 (冷卻期間內只減一次)。
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, latency_factor: float = 3.0,
+                 cooldown_seconds: float = 1.0, ewma_alpha: float = 0.2):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.latency_factor = latency_factor
+        self.cooldown_seconds = cooldown_seconds
+        self.ewma_alpha = ewma_alpha
+        self.limit = float(self.maximum)
+        self.decreases = 0
+        self._in_flight = 0
+        self._fastest_ms: Dict[str, float] = {}
+        self._latency_ratio = 1.0
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """取得一個並行名額；超過 deadline (monotonic 秒) 仍無法取得時回傳 False"""
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    return False
+                self._cond.wait(timeout)
+            self._in_flight += 1
+            return True
+
+    def release(self, key: str, latency_ms: float, overloaded: bool):
+        """歸還名額並依結果調整上限 (key 為端點識別，用於比較延遲變化)"""
+        with self._cond:
+            self._in_flight -= 1
+            if not overloaded and latency_ms > 0:
+                fastest = min(self._fastest_ms.get(key, latency_ms), latency_ms)
+                self._fastest_ms[key] = fastest
+                ratio = latency_ms / max(fastest, 1.0)
+                self._latency_ratio += self.ewma_alpha * (ratio - self._latency_ratio)
+                overloaded = self._latency_ratio > self.latency_factor
+
+            now = time.monotonic()
+            if overloaded:
+                if now - self._last_decrease >= self.cooldown_seconds:
+                    self.limit = max(float(self.minimum), self.limit / 2)
+                    self._last_decrease = now
+                    self.decreases += 1
+                    self._latency_ratio = 1.0
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class RecordReader:
+    """API 記錄檔讀取器
+
+    - .jsonl：每行一個 JSON；可為 {"testInfo": ...}、完整頁面流程 (含 apiCalls)，
+      或帶有 pageFlow 欄位的單一 API 呼叫，逐行讀取
+    - .json：安裝 ijson 時逐個頁面流程串流解析，否則整檔載入
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_jsonl = path.lower().endswith((".jsonl", ".ndjson"))
+        self._record: Optional[Dict] = None
+        if not self.is_jsonl and ijson is None:
+            with open(path, "r", encoding="utf-8") as f:
+                self._record = json.load(f)
+
+    @property
+    def streaming(self) -> bool:
+        """是否以串流方式讀取 (記憶體不隨記錄檔大小成長)"""
+        return self._record is None
+
+    def test_info(self) -> Dict:
+        if self._record is not None:
+            return self._record.get("testInfo", {})
+        if self.is_jsonl:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        return json.loads(line).get("testInfo", {})
+            return {}
+        with open(self.path, "rb") as f:
+            return next(ijson.items(f, "testInfo"), {})
+
+    def iter_flows(self) -> Iterator[Dict]:
+        """逐一產生頁面流程；.jsonl 的單一 API 行會包成只有一個呼叫的頁面流程"""
+        if self._record is not None:
+            yield from self._record.get("pageFlows", [])
+            return
+
+        if self.is_jsonl:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if "testInfo" in entry:
+                        continue
+                    if "apiCalls" in entry:
+                        yield entry
+                    else:
+                        yield {"pageFlow": entry.pop("pageFlow", ""), "apiCalls": [entry]}
+            return
+
+        with open(self.path, "rb") as f:
+            # ijson 以 Decimal 表示小數，轉回 float 以與 json.load 行為一致
+            for flow in ijson.items(f, "pageFlows.item", use_float=True):
+                yield flow
+
+
+def convert_record_to_jsonl(record_path: str, output_path: str) -> int:
+    """將 .json 記錄檔轉為 .jsonl (每行一個 API 呼叫)，回傳寫出的呼叫數"""
+    reader = RecordReader(record_path)
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        out.write(json.dumps({"testInfo": reader.test_info()}, ensure_ascii=False) + "\n")
+        for flow in reader.iter_flows():
+            for api in flow.get("apiCalls", []):
+                entry = {"pageFlow": flow.get("pageFlow", ""), **api}
+                if "intervalSeconds" in flow:
+                    entry.setdefault("intervalSeconds", flow["intervalSeconds"])
+                out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                count += 1
+    return count
+
+
+class ProbeStateStore:
+    """增量模式的端點狀態 (JSON 檔)：上次狀態、延遲 EWMA、連續成功次數
+
+    有風險的端點每次都探測；長期穩定的端點依連續成功次數拉長探測間隔，
+    但最多連續略過 max_skipped_runs 次；記錄項目內容變更時一定探測。
+    各端點以請求指紋決定抽樣的相位，同時穩定下來的端點會分散在不同次執行中探測。
+    """
+
+    def __init__(self, state_path: str, stable_after: int = 3, max_skipped_runs: int = 10,
+                 ewma_alpha: float = 0.3, slow_ratio: float = 0.5):
+        self.state_path = state_path
+        self.stable_after = stable_after
+        self.max_skipped_runs = max_skipped_runs
+        self.ewma_alpha = ewma_alpha
+        self.slow_ratio = slow_ratio
+        self._states: Dict[str, Dict] = {}
+        self.runs = 0  # 已完成的增量執行次數，作為抽樣相位的時鐘
+        if os.path.exists(state_path):
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}  # 狀態檔損毀時視為全部需要探測
+            if "endpoints" in data:
+                self._states = data["endpoints"]
+                self.runs = data.get("runs", 0)
+            else:
+                self._states = data  # 舊格式 (指紋 -> 狀態)
+
+    def should_probe(self, plan: "ProbePlan", sla_threshold_ms: float) -> bool:
+        state = self._states.get(plan.fingerprint)
+        if state is None or state.get("entryHash") != plan.entry_hash:
+            return True  # 新端點或記錄項目已變更
+        if not state.get("lastSuccess") or state.get("consecutiveSuccesses", 0) < self.stable_after:
+            return True  # 最近失敗或尚未穩定
+        if state.get("latencyEwmaMs", 0.0) > sla_threshold_ms * self.slow_ratio:
+            return True  # 延遲接近 SLA
+
+        # 穩定端點：連續成功越多，探測間隔 (以執行次數計) 越長；相位依指紋錯開
+        sample_every = min(self.max_skipped_runs + 1,
+                           max(1, state["consecutiveSuccesses"] // self.stable_after))
+        phase = int(plan.fingerprint[:8], 16) % sample_every
+        return (self.runs + phase) % sample_every == 0 or state.get("skippedRuns", 0) + 1 >= sample_every
+
+    def mark_skipped(self, plan: "ProbePlan"):
+        state = self._states[plan.fingerprint]
+        state["skippedRuns"] = state.get("skippedRuns", 0) + 1
+
+    def update(self, plan: "ProbePlan", result: ApiTestResult):
+        state = self._states.get(plan.fingerprint)
+        if state is None or state.get("entryHash") != plan.entry_hash:
+            state = {"latencyEwmaMs": result.response_time_ms, "consecutiveSuccesses": 0}
+        else:
+            state["latencyEwmaMs"] = (self.ewma_alpha * result.response_time_ms +
+                                      (1 - self.ewma_alpha) * state.get("latencyEwmaMs", result.response_time_ms))
+        state.update(
+            endpoint=plan.endpoint,
+            entryHash=plan.entry_hash,
+            lastStatus=result.actual_status,
+            lastSuccess=result.is_success,
+            consecutiveSuccesses=state.get("consecutiveSuccesses", 0) + 1 if result.is_success else 0,
+            skippedRuns=0,
+            lastProbedAt=datetime.now().isoformat()
+        )
+        self._states[plan.fingerprint] = state
+
+    def save(self):
+        """存檔，每次增量執行結束時呼叫一次 (同時推進抽樣時鐘)"""
+        self.runs += 1
+        _atomic_write_json(self.state_path, {"runs": self.runs, "endpoints": self._states}, mode=0o644, indent=2)
+
+
+class LatencyBaseline:
+    """各端點的歷史延遲基準 (JSON 檔)，以穩健 z 分數 (中位數 / MAD) 偵測顯著變慢
+
+    每個端點保留最近 window 次成功探測的回應時間；本次延遲同時滿足 z 分數、
+    相對中位數倍數與絕對差距三個門檻時視為效能退化，避免快速端點的小幅抖動被誤判。
+    """
+
+    _lock = threading.Lock()  # 多目標模式下多個測試器共用同一個基準檔
+
+    def __init__(self, baseline_path: str, window: int = 30, min_samples: int = 5, z_threshold: float = 3.5,
+                 min_ratio: float = 1.5, min_delta_ms: float = 100.0):
+        self.baseline_path = baseline_path
+        self.window = window
+        self.min_samples = min_samples
+        self.z_threshold = z_threshold
+        self.min_ratio = min_ratio
+        self.min_delta_ms = min_delta_ms
+        self._endpoints: Dict[str, Dict] = self._read()
+        self._dirty: set = set()
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.baseline_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("endpoints", {})
+        except (OSError, ValueError):
+            return {}  # 基準檔不存在或損毀時從頭累積
+
+    @staticmethod
+    def key_for(scope: str, endpoint: str, request_params: Dict) -> str:
+        """基準鍵：目標 (base_url/tenant) + 端點 + 遮罩後的參數"""
+        return f"{scope}|{endpoint}|{json.dumps(request_params, sort_keys=True, ensure_ascii=False)}"
+
+    @staticmethod
+    def _median(ordered: List[float]) -> float:
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+    def detect(self, samples: List[tuple]) -> List[Dict]:
+        """一次比對所有 (鍵, 結果)，回傳顯著變慢的端點 (依 z 分數由高到低)"""
+        stats: Dict[str, Optional[tuple]] = {}
+        regressions = []
+        for key, result in samples:
+            if key not in stats:
+                history = self._endpoints.get(key, {}).get("samples", [])
+                if len(history) < self.min_samples:
+                    stats[key] = None
+                else:
+                    ordered = sorted(history)
+                    median = self._median(ordered)
+                    mad = self._median(sorted(abs(x - median) for x in ordered))
+                    # MAD 換算為標準差尺度；歷史幾乎不變時以中位數的 5% 為下限，避免除以 0
+                    scale = max(mad * 1.4826, median * 0.05, 1.0)
+                    stats[key] = (median, mad, scale, len(history))
+            if stats[key] is None:
+                continue
+
+            median, mad, scale, count = stats[key]
+            latency_ms = result.response_time_ms
+            z_score = (latency_ms - median) / scale
+            if (z_score >= self.z_threshold and latency_ms >= median * self.min_ratio and
+                    latency_ms - median >= self.min_delta_ms):
+                regressions.append({
+                    "endpoint": result.endpoint,
+                    "method": result.method,
+                    "pageFlow": result.page_flow,
+                    "responseTimeMs": round(latency_ms, 2),
+                    "baselineMedianMs": round(median, 2),
+                    "baselineMadMs": round(mad, 2),
+                    "ratio": round(latency_ms / max(median, 0.001), 2),
+                    "zScore": round(z_score, 2),
+                    "samples": count
+                })
+
+        regressions.sort(key=lambda r: r["zScore"], reverse=True)
+        return regressions
+
+    def add(self, key: str, endpoint: str, latency_ms: float):
+        entry = self._endpoints.setdefault(key, {"endpoint": endpoint, "samples": []})
+        entry["samples"].append(round(latency_ms, 1))
+        del entry["samples"][:-self.window]
+        self._dirty.add(key)
+
+    def import_report(self, report_path: str, scope: str) -> int:
+        """由先前的 test-result.json 匯入成功探測的回應時間，回傳匯入筆數"""
+        with open(report_path, "r", encoding="utf-8") as f:
+            return self._import_report_data(json.load(f), scope)
+
+    def seed_from_git(self, report_path: str, scope: str, max_reports: Optional[int] = None) -> int:
+        """由 git 歷史中先前提交的報告建立基準 (如 GitHub Actions 每次提交的 test-result.json)，回傳匯入筆數
+
+        不在 git 儲存庫中或沒有歷史時回傳 0。
+        """
+        directory, name = os.path.split(os.path.abspath(report_path))
+        try:
+            commits = subprocess.run(
+                ["git", "log", f"-n{max_reports or self.window}", "--format=%H", "--", name],
+                cwd=directory, capture_output=True, text=True, check=True, timeout=30
+            ).stdout.split()
+        except (OSError, subprocess.SubprocessError):
+            return 0
+
+        count = 0
+        for commit in reversed(commits):  # 由舊到新加入，視窗只保留最近的樣本
+            try:
+                content = subprocess.run(["git", "show", f"{commit}:./{name}"], cwd=directory,
+                                         capture_output=True, check=True, timeout=30).stdout
+                count += self._import_report_data(json.loads(content), scope)
+            except (OSError, subprocess.SubprocessError, ValueError):
+                continue  # 該次提交的報告損毀或格式不符時略過
+        return count
+
+    def _import_report_data(self, report_data: Dict, scope: str) -> int:
+        count = 0
+        for item in report_data.get("detailedResults", []):
+            if item.get("isSuccess") and item.get("actualStatus") == item.get("expectedStatus") \
+                    and not item.get("coalesced"):
+                key = self.key_for(scope, item["endpoint"], item.get("requestParams") or {})
+                self.add(key, item["endpoint"], item["responseTimeMs"])
+                count += 1
+        return count
+
+    def save(self):
+        """寫回本測試器更新的端點 (與檔案中其他測試器的端點合併)"""
+        with self._lock:
+            endpoints = self._read()
+            for key in self._dirty:
+                endpoints[key] = self._endpoints[key]
+            _atomic_write_json(self.baseline_path, {"window": self.window, "endpoints": endpoints}, mode=0o644)
+            self._dirty.clear()
+
+
+class MetricsRegistry:
+    """探測結果的 Prometheus / OpenMetrics 指標，隨每筆結果即時更新
+
+    可由本機 HTTP 端點 (/metrics) 供 Prometheus 抓取，或定期寫入 node_exporter 的
+    textfile collector 目錄。
+    """
+
+    PREFIX = "api_health"
+    BUCKETS_SECONDS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, textfile_path: Optional[str] = None, textfile_interval: float = 1.0):
+        self.textfile_path = textfile_path
+        self.textfile_interval = textfile_interval
+        self._lock = threading.Lock()
+        # (endpoint, method) -> [各 bucket 計數..., 總和 (秒), 次數]
+        self._histograms: Dict[tuple, List[float]] = {}
+        self._status_counts: Dict[tuple, int] = {}
+        self._success: Dict[tuple, int] = {}
+        self._retries = 0
+        self._short_circuited = 0
+        self._in_flight = 0
+        self._queue_depth = 0
+        self._run_started: Optional[float] = None
+        self._run_duration = 0.0
+        self._last_run_finished: Optional[float] = None
+        self._health_score: Optional[float] = None
+        self._last_textfile_write = 0.0
+        self._server = None
+
+    def observe(self, result: ApiTestResult):
+        """記錄一筆探測結果 (合併請求的複本不重複計入，未送出的請求只計入斷路次數)"""
+        if result.coalesced:
+            return
+        if result.not_probed:
+            if result.short_circuited:
+                with self._lock:
+                    self._short_circuited += 1
+                self._maybe_write_textfile()
+            return
+        key = (result.endpoint, result.method)
+        seconds = result.response_time_ms / 1000
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.BUCKETS_SECONDS) + 2)
+            for i, bound in enumerate(self.BUCKETS_SECONDS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+
+            status_key = key + (str(result.actual_status),)
+            self._status_counts[status_key] = self._status_counts.get(status_key, 0) + 1
+            self._success[key] = 1 if result.is_success else 0
+            self._retries += max(0, result.attempts - 1)
+        self._maybe_write_textfile()
+
+    def probe_started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def probe_finished(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def set_queue_depth(self, depth: int):
+        """已排入但尚未完成的探測數"""
+        self._queue_depth = depth
+
+    def run_started(self):
+        with self._lock:
+            self._run_started = time.monotonic()
+
+    def run_finished(self, health_score: Optional[float]):
+        """記錄一次測試結束；健康度未知 (None) 時不輸出健康度指標"""
+        with self._lock:
+            if self._run_started is not None:
+                self._run_duration = time.monotonic() - self._run_started
+            self._run_started = None
+            self._last_run_finished = time.time()
+            self._health_score = health_score
+            self._queue_depth = 0
+        self.write_textfile()
+
+    @staticmethod
+    def _labels(**labels) -> str:
+        def escape(value) -> str:
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+    def render(self, openmetrics: bool = False) -> str:
+        """輸出 Prometheus 文字格式 (openmetrics=True 時為 OpenMetrics 1.0)"""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str):
+            # Prometheus 格式的 counter 以 _total 結尾的樣本名稱宣告，OpenMetrics 以家族名稱宣告
+            declared = f"{name}_total" if kind == "counter" and not openmetrics else name
+            lines.append(f"# HELP {declared} {help_text}")
+            lines.append(f"# TYPE {declared} {kind}")
+
+        p = self.PREFIX
+        with self._lock:
+            family(f"{p}_probe_duration_seconds", "histogram", "各端點探測回應時間")
+            for (endpoint, method), histogram in sorted(self._histograms.items()):
+                for bound, count in zip(self.BUCKETS_SECONDS, histogram):
+                    labels = self._labels(endpoint=endpoint, method=method, le=bound)
+                    lines.append(f"{p}_probe_duration_seconds_bucket{labels} {count}")
+                labels = self._labels(endpoint=endpoint, method=method, le="+Inf")
+                lines.append(f"{p}_probe_duration_seconds_bucket{labels} {histogram[-1]}")
+                labels = self._labels(endpoint=endpoint, method=method)
+                lines.append(f"{p}_probe_duration_seconds_sum{labels} {histogram[-2]:.6f}")
+                lines.append(f"{p}_probe_duration_seconds_count{labels} {histogram[-1]}")
+
+            family(f"{p}_probe_status", "counter", "各端點回應狀態碼次數 (0 = 連線錯誤/超時/未送出)")
+            for (endpoint, method, status), count in sorted(self._status_counts.items()):
+                labels = self._labels(endpoint=endpoint, method=method, status=status)
+                lines.append(f"{p}_probe_status_total{labels} {count}")
+
+            family(f"{p}_probe_success", "gauge", "各端點最近一次探測是否成功 (1/0)")
+            for (endpoint, method), value in sorted(self._success.items()):
+                lines.append(f"{p}_probe_success{self._labels(endpoint=endpoint, method=method)} {value}")
+
+            family(f"{p}_probe_retries", "counter", "重試次數")
+            lines.append(f"{p}_probe_retries_total {self._retries}")
+            family(f"{p}_probe_short_circuited", "counter", "因主機斷路而未送出的探測數")
+            lines.append(f"{p}_probe_short_circuited_total {self._short_circuited}")
+
+            family(f"{p}_probes_in_flight", "gauge", "正在送出請求的探測數")
+            lines.append(f"{p}_probes_in_flight {self._in_flight}")
+            family(f"{p}_queue_depth", "gauge", "已排入但尚未完成的探測數")
+            lines.append(f"{p}_queue_depth {self._queue_depth}")
+
+            running = self._run_started is not None
+            duration = time.monotonic() - self._run_started if running else self._run_duration
+            family(f"{p}_run_in_progress", "gauge", "是否正在執行測試 (1/0)")
+            lines.append(f"{p}_run_in_progress {1 if running else 0}")
+            family(f"{p}_run_duration_seconds", "gauge", "執行中測試已耗時，或上一次測試的總耗時")
+            lines.append(f"{p}_run_duration_seconds {duration:.3f}")
+            if self._last_run_finished is not None:
+                family(f"{p}_last_run_timestamp_seconds", "gauge", "上一次測試完成時間 (epoch 秒)")
+                lines.append(f"{p}_last_run_timestamp_seconds {self._last_run_finished:.3f}")
+            if self._health_score is not None:
+                family(f"{p}_health_score_percent", "gauge", "上一次測試的健康度評分")
+                lines.append(f"{p}_health_score_percent {self._health_score:.2f}")
+
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def _maybe_write_textfile(self):
+        if self.textfile_path and time.monotonic() - self._last_textfile_write >= self.textfile_interval:
+            self.write_textfile()
+
+    def write_textfile(self):
+        """原子寫入 textfile collector 檔案 (node_exporter 只讀取完整檔案)"""
+        if not self.textfile_path:
+            return
+        self._last_textfile_write = time.monotonic()
+        tmp_path = f"{self.textfile_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.textfile_path)
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """在背景執行緒提供 /metrics HTTP 端點"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = registry.render(openmetrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8"
+                                 if openmetrics else "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class TokenCache:
+    """登入 Token 的磁碟快取，以 base_url/tenant/account 為鍵
+
+    保存 accessToken、到期時間與 orgEmpCode；檔案權限限制為僅擁有者可讀寫 (600)。
+    """
+
+    _lock = threading.Lock()  # 多目標模式下多個測試器共用同一個快取檔
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+
+    @staticmethod
+    def key_for(base_url: str, tenant: str, account: str) -> str:
+        return hashlib.sha256(f"{base_url}|{tenant}|{account}".encode("utf-8")).hexdigest()
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._read().get(key)
+
+    def put(self, key: str, entry: Dict):
+        with self._lock:
+            entries = self._read()
+            entries[key] = entry
+            self._write(entries)
+
+    def discard(self, key: str):
+        with self._lock:
+            entries = self._read()
+            if entries.pop(key, None) is not None:
+                self._write(entries)
+
+    def _write(self, entries: Dict[str, Dict]):
+        # 暫存檔以 600 權限建立且每個寫入者各自一個，多行程同時寫入也不會互相取代或刪除
+        _atomic_write_json(self.cache_path, entries)
 
 
 class ApiHealthTester:
     """API 健康度測試器"""
 
-    def __init__(self, config_path: str, parallel_workers: int = 1):
+    def __init__(self, config_path: Optional[str], parallel_workers: int = 1, engine: str = "thread",
+                 async_concurrency: int = 100, config: Optional[Dict] = None, processes: Optional[int] = None):
         """初始化測試器
         
         Args:
-            config_path: 設定檔路徑
+            config_path: 設定檔路徑 (有傳入 config 時可為 None)
             parallel_workers: 並行執行緒數量 (預設 1 = 序列執行)
+            engine: 執行引擎，"thread" (執行緒)、"async" (asyncio) 或 "process" (多行程)
+            async_concurrency: async 引擎同時進行中的請求上限
+            config: 直接指定設定內容 (多目標模式由 run_fleet 傳入)
+            processes: process 引擎的工作行程數 (預設 CPU 核心數)
         """
-        self.config = self._load_config(config_path)
+        self.config = config if config is not None else self._load_config(config_path)
         self.base_url = self.config.get("base_url", "")
         self.token: Optional[str] = None
+        self.token_expires_at: Optional[float] = None  # epoch 秒，無法得知時為 None
+        self.token_cache: Optional[TokenCache] = None
         self.session = requests.Session()
         self.parallel_workers = parallel_workers
+        self.engine = engine
+        self.async_concurrency = async_concurrency
+        self.processes = processes or os.cpu_count() or 1
+        self.request_gate: Optional[ConcurrencyGate] = None
 
         # 從 config 讀取 SLA 閾值，預設 10000ms（ABP 專案第一次呼叫較慢）
         self.sla_threshold_ms = self.config.get("sla_threshold_ms", 10000)
@@ -73,6 +1676,81 @@ class ApiHealthTester:
         # 禁用 SSL 憑證驗證（測試環境可能使用自簽憑證）
         self.session.verify = False
 
+        # 連線池大小依並行數調整，避免超出預設 10 條連線後被丟棄並重做 TLS 握手
+        effective_concurrency = self.async_concurrency if self.engine == "async" else self.parallel_workers
+        self.pool_maxsize = self.config.get("pool_maxsize") or max(10, effective_concurrency)
+        self.pool_maxsize_per_host: Dict[str, int] = self.config.get("pool_maxsize_per_host", {})
+        self.pool_warmup = self.config.get("pool_warmup", True)
+        self._configure_connection_pool()
+
+        # 串流回應模式：僅讀取驗證所需內容並計算大小/雜湊，不保留回應本體
+        self.stream_responses = self.config.get("stream_responses", False)
+        self.max_body_bytes = self.config.get("max_body_bytes", 10 * 1024 * 1024)
+
+        # 增量模式的端點狀態 (由 enable_incremental 啟用)
+        self.probe_state: Optional[ProbeStateStore] = None
+
+        # 相同請求 (方法、URL、參數與預期皆相同) 在同一次測試中只送出一次
+        self.coalesce_probes = self.config.get("coalesce_probes", True)
+
+        # Prometheus / OpenMetrics 指標 (由 enable_metrics 啟用)
+        self.metrics: Optional[MetricsRegistry] = None
+
+        # 執行中逐筆寫出結果與摘要索引 (由 enable_result_stream 啟用)
+        self.result_writer: Optional[ResultStreamWriter] = None
+        self.write_full_report = True
+
+        # 重試與抖動退避：僅重試連線錯誤、超時、429 與非預期的 5xx
+        self.request_timeout = self.config.get("request_timeout_seconds", 30)
+        self.max_retries = self.config.get("retry_max_retries", 2)
+        self.retry_backoff_ms = self.config.get("retry_backoff_ms", 200)
+        self.retry_backoff_max_ms = self.config.get("retry_backoff_max_ms", 5000)
+
+        # 各主機斷路器：主機明顯故障時快速失敗，不再逐一等待超時 (門檻 0 = 停用)
+        self.circuit_breaker: Optional[CircuitBreaker] = None
+        if self.config.get("circuit_breaker_threshold", 5) > 0:
+            self.circuit_breaker = CircuitBreaker(
+                failure_threshold=self.config.get("circuit_breaker_threshold", 5),
+                reset_timeout=self.config.get("circuit_breaker_reset_seconds", 30)
+            )
+
+        # thread 引擎的 AIMD 自適應並行上限 (以 parallel_workers 為上限)
+        self.concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+        if self.config.get("adaptive_concurrency", True) and self.parallel_workers > 1:
+            self.concurrency_limiter = AdaptiveConcurrencyLimiter(
+                self.parallel_workers,
+                minimum=self.config.get("adaptive_concurrency_min", 1),
+                latency_factor=self.config.get("adaptive_latency_factor", 3.0)
+            )
+
+        # 整次掃描的時間預算 (秒)；超過後尚未開始的探測直接略過
+        self.sweep_budget_seconds: Optional[float] = self.config.get("sweep_budget_seconds")
+        self.sweep_deadline: Optional[float] = None  # monotonic 秒，由 run_tests 設定
+
+        # 由錄製回應推斷的結構驗證，推斷結果依記錄項目雜湊快取於磁碟
+        self.schema_cache: Optional[SchemaCache] = None
+        if self.config.get("schema_validation", True):
+            cache_path = Path(self.config.get("schema_cache_path", "schema-cache.json"))
+            if config_path and not cache_path.is_absolute():
+                cache_path = Path(config_path).parent / cache_path
+            self.schema_cache = SchemaCache(str(cache_path),
+                                            max_age_days=self.config.get("schema_cache_max_age_days", 30))
+
+        # 各端點的歷史延遲基準，用於偵測相對過去明顯變慢 (SLA 閾值以下的退化)
+        self.latency_baseline: Optional[LatencyBaseline] = None
+        if self.config.get("regression_detection", True):
+            baseline_path = Path(self.config.get("baseline_path", "latency-baseline.json"))
+            if config_path and not baseline_path.is_absolute():
+                baseline_path = Path(config_path).parent / baseline_path
+            self.enable_regression_detection(str(baseline_path))
+
+        # 登入 Token 的磁碟快取 (選用)，排程頻繁執行時可省去登入
+        if self.config.get("token_cache_path"):
+            token_cache_path = Path(self.config["token_cache_path"])
+            if config_path and not token_cache_path.is_absolute():
+                token_cache_path = Path(config_path).parent / token_cache_path
+            self.enable_token_cache(str(token_cache_path))
+
         # 設定預設 headers
         self.session.headers.update({
             "Content-Type": "application/json",
@@ -81,13 +1759,146 @@ class ApiHealthTester:
             "X-Requested-With": "XMLHttpRequest"  # 模擬 AJAX 請求
         })
 
+    def enable_regression_detection(self, baseline_path: str):
+        """啟用效能退化偵測：與各端點歷史延遲基準比較"""
+        self.latency_baseline = LatencyBaseline(
+            baseline_path,
+            window=self.config.get("baseline_window", 30),
+            min_samples=self.config.get("baseline_min_samples", 5),
+            z_threshold=self.config.get("regression_z_threshold", 3.5),
+            min_ratio=self.config.get("regression_min_ratio", 1.5),
+            min_delta_ms=self.config.get("regression_min_delta_ms", 100.0)
+        )
+
+    def _baseline_scope(self) -> str:
+        return f"{self.base_url}|{self.config.get('tenant', '')}"
+
+    def _detect_regressions(self, report: HealthReport):
+        """與歷史基準比較本次成功的探測，再將本次結果加入基準"""
+        baseline = self.latency_baseline
+        scope = self._baseline_scope()
+        samples = [
+            (LatencyBaseline.key_for(scope, r.endpoint, r.request_params), r)
+            for r in report.results
+            if r.is_success and r.actual_status == r.expected_status and not r.coalesced
+        ]
+        report.performance_regressions = baseline.detect(samples)
+        for key, result in samples:
+            baseline.add(key, result.endpoint, result.response_time_ms)
+        baseline.save()
+
+    def enable_metrics(self, port: Optional[int] = None, textfile_path: Optional[str] = None,
+                       host: str = "127.0.0.1"):
+        """啟用指標輸出：本機 HTTP 端點 (/metrics) 和/或 textfile collector 檔案"""
+        self.metrics = MetricsRegistry(textfile_path)
+        if port is not None:
+            self.metrics.serve(port, host)
+            print(f"[指標] 已於 http://{host}:{port}/metrics 提供")
+
+    def enable_token_cache(self, cache_path: str):
+        """啟用 Token 磁碟快取：登入前先嘗試沿用仍有效的 Token"""
+        self.token_cache = TokenCache(cache_path)
+
+    def enable_result_stream(self, output_path: str):
+        """啟用結果串流：test-result.json 旁寫出 .ndjson 詳細結果與 .summary.json 摘要索引"""
+        base = Path(output_path).with_suffix("")
+        self.result_writer = ResultStreamWriter(
+            f"{base}.ndjson",
+            f"{base}.summary.json",
+            page_size=self.config.get("report_page_size", 200),
+            slowest_count=self.config.get("report_slowest_count", 20)
+        )
+
+    def enable_incremental(self, state_path: str):
+        """啟用增量模式：依端點狀態略過長期穩定的端點"""
+        self.probe_state = ProbeStateStore(
+            state_path,
+            stable_after=self.config.get("incremental_stable_after", 3),
+            max_skipped_runs=self.config.get("incremental_max_skipped_runs", 10)
+        )
+
     def _load_config(self, config_path: str) -> Dict:
         """載入設定檔"""
         with open(config_path, "r", encoding="utf-8") as f:
             return json.load(f)
 
-    def login(self) -> bool:
-        """執行登入取得 Token"""
+    def _configure_connection_pool(self):
+        """掛載依並行數調整大小的連線池 (可依主機個別設定)"""
+        pool_connections = max(10, len(self.pool_maxsize_per_host) + 1)
+        for scheme in ("https://", "http://"):
+            self.session.mount(scheme, TimedHTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=self.pool_maxsize
+            ))
+            for host, size in self.pool_maxsize_per_host.items():
+                self.session.mount(f"{scheme}{host}/", TimedHTTPAdapter(pool_connections=1, pool_maxsize=size))
+
+    def _pool_size_for(self, host: str) -> int:
+        """取得指定主機的連線池大小"""
+        return self.pool_maxsize_per_host.get(host, self.pool_maxsize)
+
+    def _connection_stats(self) -> tuple:
+        """統計 requests 連線池累計開啟的連線數與送出的請求數"""
+        opened = 0
+        sent = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+        return opened, sent
+
+    @staticmethod
+    def _collect_hosts(apis_to_test: List) -> Dict[str, str]:
+        """收集待測 API 的主機 (netloc -> scheme://netloc)"""
+        hosts = {}
+        for _, api in apis_to_test:
+            parts = urlsplit(api.full_url)
+            if parts.netloc:
+                hosts.setdefault(parts.netloc, f"{parts.scheme}://{parts.netloc}/")
+        return hosts
+
+    def _base_url_hosts(self) -> Dict[str, str]:
+        """設定檔 base_url 的主機 (netloc -> scheme://netloc)"""
+        parts = urlsplit(self.base_url)
+        return {parts.netloc: f"{parts.scheme}://{parts.netloc}/"} if parts.netloc else {}
+
+    def _warm_up_connections(self, hosts: Dict[str, str], concurrency: int) -> int:
+        """在計時探測前預先建立連線，避免握手時間計入回應時間"""
+        if not self.pool_warmup:
+            return 0
+
+        opened_before, _ = self._connection_stats()
+        for host, root_url in hosts.items():
+            count = max(1, min(concurrency, self._pool_size_for(host)))
+
+            def touch(_):
+                # 多目標模式下預熱請求同樣受全域/主機並行上限約束
+                gate = self.request_gate
+                if gate is not None:
+                    gate.acquire(root_url)
+                try:
+                    self.session.head(root_url, timeout=10, allow_redirects=False)
+                except Exception:
+                    pass  # 預熱失敗不影響後續測試
+                finally:
+                    if gate is not None:
+                        gate.release(root_url)
+
+            # 同時送出請求才能讓連線池保留多條連線
+            with ThreadPoolExecutor(max_workers=count) as executor:
+                list(executor.map(touch, range(count)))
+
+        opened_after, _ = self._connection_stats()
+        return opened_after - opened_before
+
+    def login(self, use_cache: bool = True) -> bool:
+        """執行登入取得 Token (啟用 Token 快取時優先沿用快取)"""
+        if use_cache and self.token_cache is not None and self._restore_cached_token():
+            return True
+
         login_url = f"{self.base_url}/api/app/users/Login"
         login_data = {
             "TenantName": self.config["tenant"],
@@ -109,11 +1920,15 @@ class ApiHealthTester:
                 )
                 if self.token:
                     self.session.headers["Authorization"] = f"Bearer {self.token}"
+                    self.token_expires_at = self._token_expiry(data, self.token)
                     print(f"[登入] 成功取得 Token")
                     
                     # 取得使用者資訊以獲取 orgEmpCode
                     self._fetch_user_info()
-                    
+
+                    if self.token_cache is not None:
+                        self._save_cached_token()
+
                     return True
                 else:
                     print(f"[登入] 響應中找不到 Token: {data}")
@@ -126,6 +1941,81 @@ class ApiHealthTester:
             print(f"[登入] 錯誤: {str(e)}")
             return False
 
+    def _token_cache_key(self) -> str:
+        return TokenCache.key_for(self.base_url, self.config.get("tenant", ""), self.config.get("account", ""))
+
+    def _save_cached_token(self):
+        """寫入 Token 快取；寫入失敗只代表下次需重新登入，不影響本次已成功的登入"""
+        try:
+            self.token_cache.put(self._token_cache_key(), {
+                "accessToken": self.token,
+                "expiresAt": self.token_expires_at,
+                "orgEmpCode": self.org_emp_code,
+                "savedAt": time.time()
+            })
+        except OSError as e:
+            print(f"[登入] 警告: Token 快取寫入失敗: {e}")
+
+    def _restore_cached_token(self, margin_seconds: float = 120) -> bool:
+        """沿用快取的 Token：以一次 GetUserInfo 驗證仍有效，失效 (401 等) 時捨棄快取"""
+        key = self._token_cache_key()
+        entry = self.token_cache.get(key)
+        if not entry or not entry.get("accessToken"):
+            return False
+        expires_at = entry.get("expiresAt")
+        if expires_at is not None and time.time() >= expires_at - margin_seconds:
+            return False
+
+        self.session.headers["Authorization"] = f"Bearer {entry['accessToken']}"
+        try:
+            response = self.session.get(f"{self.base_url}/api/app/share/GetUserInfo", timeout=self.request_timeout)
+            status = response.status_code
+        except Exception as e:
+            response = None
+            status = str(e)
+
+        if response is not None and status == 200:
+            self.token = entry["accessToken"]
+            self.token_expires_at = expires_at
+            try:
+                self.org_emp_code = response.json().get("orgEmpCode", "") or entry.get("orgEmpCode", "")
+            except ValueError:
+                self.org_emp_code = entry.get("orgEmpCode", "")
+            print(f"[登入] 沿用快取的 Token (orgEmpCode: {self.org_emp_code})")
+            return True
+
+        self.session.headers.pop("Authorization", None)
+        try:
+            self.token_cache.discard(key)
+        except OSError as e:
+            print(f"[登入] 警告: Token 快取寫入失敗: {e}")
+        print(f"[登入] 快取的 Token 已失效 ({status})，重新登入")
+        return False
+
+    @staticmethod
+    def _token_expiry(login_data: Dict, token: str) -> Optional[float]:
+        """由登入回應的有效秒數或 JWT 的 exp 取得 Token 到期時間 (epoch 秒)"""
+        for source in (login_data, login_data.get("id4Token") or {}):
+            for key in ("expireInSeconds", "expiresIn", "expires_in"):
+                if isinstance(source.get(key), (int, float)):
+                    return time.time() + source[key]
+
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+            return float(exp) if exp else None
+        except (IndexError, ValueError, AttributeError):
+            return None
+
+    def ensure_token_fresh(self, margin_seconds: float = 120) -> bool:
+        """Token 即將到期 (或尚未登入) 時重新登入"""
+        if self.token and (self.token_expires_at is None or
+                           time.time() < self.token_expires_at - margin_seconds):
+            return True
+        print("[登入] Token 即將到期，重新登入")
+        return self.login()
+
     def _fetch_user_info(self):
         """取得登入使用者資訊"""
         try:
@@ -142,175 +2032,579 @@ class ApiHealthTester:
             print(f"[使用者] 取得使用者資訊錯誤: {str(e)}")
             self.org_emp_code = ""
 
-    def _replace_dynamic_params(self, params: Dict) -> Dict:
-        """替換請求參數中的動態標記"""
-        if not params:
-            return params
-        
-        result = {}
-        for key, value in params.items():
-            if isinstance(value, str):
-                # 替換使用者員工代碼標記
-                if value == "***USE_LOGGED_IN_USER_EMP_CODE***":
-                    result[key] = getattr(self, 'org_emp_code', '')
-                else:
-                    result[key] = value
-            elif isinstance(value, dict):
-                result[key] = self._replace_dynamic_params(value)
-            elif isinstance(value, list):
-                result[key] = [
-                    self._replace_dynamic_params(item) if isinstance(item, dict)
-                    else (getattr(self, 'org_emp_code', '') if item == "***USE_LOGGED_IN_USER_EMP_CODE***" else item)
-                    for item in value
-                ]
-            else:
-                result[key] = value
-        return result
+    def compile_plan(self, api_info: Dict, default_interval: Optional[float] = None) -> "ProbePlan":
+        """將記錄項目編譯為探測計畫 (重複執行時應重用同一個計畫)"""
+        entry_hash = SchemaCache.entry_hash(api_info) if (self.schema_cache or self.probe_state) else ""
+        response_schema = self.schema_cache.schema_for(api_info, entry_hash) if self.schema_cache else None
+        return ProbePlan(api_info, default_interval, response_schema, entry_hash)
+
+    def _resolve_plan(self, api_info) -> tuple:
+        """取得探測計畫及其綁定登入資訊後的請求參數與遮蔽後參數"""
+        plan = api_info if isinstance(api_info, ProbePlan) else self.compile_plan(api_info)
+        request_params, safe_params = plan.bind(
+            getattr(self, 'org_emp_code', ''),
+            self.config.get("password", "")
+        )
+        return plan, request_params, safe_params
+
+    def _evaluate_response(self, plan: "ProbePlan", safe_params: Dict, actual_status: int, response_body: Any,
+                           response_time_ms: float, timings: ProbeTimings,
+                           digest: Optional[ResponseDigest] = None) -> ApiTestResult:
+        """根據測試策略驗證回應並產生測試結果"""
+        test_strategy = plan.test_strategy
+        expected_status = plan.expected_status
+
+        # 根據測試策略驗證結果
+        validation_errors = []
+
+        if test_strategy == "liveness_probe":
+            # 存活性探測：400 或 422 視為成功
+            is_success = actual_status in [400, 422]
+            if not is_success:
+                validation_errors.append(f"存活性探測預期 400/422，實際為 {actual_status}")
+        else:
+            # full_call：預期狀態碼必須完全相符
+            is_success = actual_status == expected_status
 
-    def _mask_sensitive_params(self, params: Dict) -> Dict:
-        """遮蔽敏感參數"""
-        if not params:
-            return params
-        
-        sensitive_keys = ["password", "Password", "token", "Token", "secret", "Secret", "key", "Key"]
-        result = {}
-        for k, v in params.items():
-            if any(sensitive in k for sensitive in sensitive_keys):
-                result[k] = "***MASKED***"
-            elif isinstance(v, dict):
-                result[k] = self._mask_sensitive_params(v)
-            else:
-                result[k] = v
-        return result
+        # 檢查回應時間
+        if response_time_ms > self.sla_threshold_ms:
+            validation_errors.append(f"回應時間 {response_time_ms:.0f}ms 超過 SLA 閾值 {self.sla_threshold_ms}ms")
 
-    def test_api(self, api_info: Dict) -> ApiTestResult:
-        """測試單一 API"""
-        endpoint = api_info.get("endpoint", "")
-        full_url = api_info.get("fullUrl", "")
-        method = api_info.get("method", "GET").upper()
-        expected_status = api_info.get("expectedStatus", 200)
-        request_params = api_info.get("requestParams", {}).copy()  # 複製避免修改原始資料
-        expected_response = api_info.get("actualResponse", {})
-        test_strategy = api_info.get("testStrategy", "full_call")
+        # 檢查響應結構 (僅 full_call 策略)；串流模式以掃描到的頂層欄位比對
+        if isinstance(response_body, dict):
+            top_level_keys = response_body.keys()
+        else:
+            top_level_keys = digest.top_level_keys() if digest is not None else None
+        if test_strategy == "full_call" and top_level_keys is not None:
+            for key in plan.expected_keys:
+                if key not in top_level_keys:
+                    validation_errors.append(f"響應缺少欄位: {key}")
+
+        # 深層結構驗證 (需有完整回應本體，狀態碼相符時才比對)
+        if (test_strategy == "full_call" and plan.schema_validator is not None
+                and actual_status == expected_status and isinstance(response_body, dict)):
+            validation_errors.extend(plan.schema_validator(response_body))
+
+        return ApiTestResult(
+            endpoint=plan.endpoint,
+            method=plan.method,
+            fingerprint=plan.fingerprint,
+            expected_status=expected_status,
+            actual_status=actual_status,
+            response_time_ms=response_time_ms,
+            is_success=is_success and len(validation_errors) == 0,
+            test_strategy=test_strategy,
+            response_body=response_body,
+            validation_errors=validation_errors,
+            request_params=safe_params,
+            timings=timings,
+            response_size=digest.size if digest is not None else 0,
+            response_sha256=digest.sha256 if digest is not None else "",
+            response_truncated=digest.truncated if digest is not None else False
+        )
 
-        # 替換動態參數
-        request_params = self._replace_dynamic_params(request_params)
+    def _error_result(self, plan: "ProbePlan", safe_params: Dict, error_message: str, response_time_ms: float,
+                      timings: ProbeTimings) -> ApiTestResult:
+        """產生請求失敗（超時、連線錯誤等）的測試結果"""
+        return ApiTestResult(
+            endpoint=plan.endpoint,
+            method=plan.method,
+            fingerprint=plan.fingerprint,
+            expected_status=plan.expected_status,
+            actual_status=0,
+            response_time_ms=response_time_ms,
+            is_success=False,
+            error_message=error_message,
+            request_params=safe_params,
+            timings=timings
+        )
+
+    def _remaining_budget(self) -> Optional[float]:
+        """掃描時間預算剩餘秒數 (未設定預算時為 None)"""
+        if self.sweep_deadline is None:
+            return None
+        return self.sweep_deadline - time.monotonic()
+
+    def _attempt_timeout(self) -> float:
+        """單次請求的超時：設定值與剩餘預算取小者"""
+        remaining = self._remaining_budget()
+        if remaining is None:
+            return self.request_timeout
+        return max(0.1, min(self.request_timeout, remaining))
+
+    def _preflight(self, plan: "ProbePlan", safe_params: Dict, check_circuit: bool = True) -> Optional[ApiTestResult]:
+        """送出請求前檢查時間預算與斷路器 (重試時只檢查預算)，不允許送出時回傳對應的結果"""
+        remaining = self._remaining_budget()
+        if remaining is not None and remaining <= 0:
+            result = self._error_result(plan, safe_params, "已超過掃描時間預算，未執行", 0.0, ProbeTimings())
+            result.budget_exhausted = True
+            return result
+        host = urlsplit(plan.full_url).netloc
+        if check_circuit and self.circuit_breaker is not None and not self.circuit_breaker.allow(host):
+            result = self._error_result(plan, safe_params, f"主機 {host} 斷路中，快速失敗", 0.0, ProbeTimings())
+            result.short_circuited = True
+            return result
+        return None
+
+    @staticmethod
+    def _is_overload(result: ApiTestResult) -> bool:
+        """連線錯誤、超時、429 或非預期的 5xx 視為主機過載/故障的訊號"""
+        if result.actual_status == result.expected_status:
+            return False
+        return result.actual_status == 0 or result.actual_status == 429 or result.actual_status >= 500
 
-        # 過濾掉敏感資料
-        if "Password" in request_params:
-            request_params = {**request_params, "Password": self.config.get("password", "")}
+    @staticmethod
+    def _is_host_down(result: ApiTestResult) -> bool:
+        """只有連線錯誤/超時與 502/503/504 視為主機故障；其餘狀態碼代表主機仍有回應"""
+        if result.actual_status == result.expected_status:
+            return False
+        return result.actual_status in (0, 502, 503, 504)
+
+    def _record_circuit(self, plan: "ProbePlan", result: ApiTestResult, attempts: int):
+        """每個探測 (不論重試幾次) 只向斷路器回報一次最終結果"""
+        if self.circuit_breaker is None or result.short_circuited:
+            return
+        host = urlsplit(plan.full_url).netloc
+        if attempts == 0:
+            self.circuit_breaker.abandon(host)
+        else:
+            self.circuit_breaker.record(host, not self._is_host_down(result), plan.fingerprint)
+
+    def _after_attempt(self, plan: "ProbePlan", result: ApiTestResult, attempt: int) -> Optional[float]:
+        """判斷單次嘗試後是否重試；需要重試時回傳退避秒數，否則回傳 None"""
+        if not self._is_overload(result) or attempt > self.max_retries:
+            return None
+
+        # 完全抖動 (full jitter) 的指數退避，避免多個請求同時重試
+        cap_ms = min(self.retry_backoff_max_ms, self.retry_backoff_ms * (2 ** (attempt - 1)))
+        delay = random.uniform(0, cap_ms) / 1000
+        remaining = self._remaining_budget()
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+    def test_api(self, api_info: Dict, resilient: bool = True) -> ApiTestResult:
+        """測試單一 API (api_info 可為記錄項目或已編譯的 ProbePlan)，失敗時依設定重試
+
+        resilient=False 時只送出一次請求，不重試、不經斷路器與自適應並行 (負載測試量測真實容量用)。
+        """
+        plan, request_params, safe_params = self._resolve_plan(api_info)
+        if not resilient:
+            if self.metrics is not None:
+                self.metrics.probe_started()
+            try:
+                return self._probe_once(plan, request_params, safe_params, self.request_timeout)
+            finally:
+                if self.metrics is not None:
+                    self.metrics.probe_finished()
+
+        result: Optional[ApiTestResult] = None
+        attempt = 0
+        while True:
+            # 斷路器只在第一次嘗試前檢查；重試途中預算用盡時，保留最後一次實際請求的結果
+            blocked = self._preflight(plan, safe_params, check_circuit=attempt == 0)
+            if blocked is not None:
+                result = result or blocked
+                break
+
+            limiter = self.concurrency_limiter
+            if limiter is not None and not limiter.acquire(self.sweep_deadline):
+                if result is None:
+                    result = self._error_result(plan, safe_params, "已超過掃描時間預算，未執行", 0.0,
+                                                ProbeTimings())
+                    result.budget_exhausted = True
+                break
+            result = None
+            metrics = self.metrics
+            if metrics is not None:
+                metrics.probe_started()
+            try:
+                result = self._probe_once(plan, request_params, safe_params, self._attempt_timeout())
+            finally:
+                if metrics is not None:
+                    metrics.probe_finished()
+                if limiter is not None:
+                    limiter.release(plan.fingerprint, result.response_time_ms if result else 0.0,
+                                    result is None or self._is_overload(result))
+
+            attempt += 1
+            delay = self._after_attempt(plan, result, attempt)
+            if delay is None:
+                break
+            time.sleep(delay)
+
+        self._record_circuit(plan, result, attempt)
+        result.attempts = attempt
+        return result
 
-        start_time = time.time()
+    def _probe_once(self, plan: "ProbePlan", request_params: Dict, safe_params: Dict,
+                    timeout: float) -> ApiTestResult:
+        """對 API 送出一次請求並驗證回應"""
+        full_url = plan.full_url
+        method = plan.method
 
+        # 多目標模式下與其他測試器共用全域/主機並行上限；等待時間不計入回應時間
+        gate = self.request_gate
+        if gate is not None:
+            gate.acquire(full_url)
+
+        phases: Dict[str, float] = {}
+        _phase_local.phases = phases
+        start_time = time.perf_counter()
+
+        stream = self.stream_responses
         try:
             if method == "GET":
-                response = self.session.get(full_url, params=request_params, timeout=30)
+                response = self.session.get(full_url, params=request_params, timeout=timeout, stream=stream)
             elif method == "POST":
-                response = self.session.post(full_url, json=request_params, timeout=30)
+                response = self.session.post(full_url, json=request_params, timeout=timeout, stream=stream)
             elif method == "PUT":
-                response = self.session.put(full_url, json=request_params, timeout=30)
+                response = self.session.put(full_url, json=request_params, timeout=timeout, stream=stream)
             elif method == "DELETE":
-                response = self.session.delete(full_url, timeout=30)
+                response = self.session.delete(full_url, timeout=timeout, stream=stream)
+            else:
+                response = self.session.request(method, full_url, json=request_params, timeout=timeout, stream=stream)
+
+            digest = self._new_digest(plan)
+            if stream:
+                # 邊下載邊計算，超過上限即停止讀取
+                with response:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        if not digest.feed(chunk):
+                            break
+                response_body = None
             else:
-                response = self.session.request(method, full_url, json=request_params, timeout=30)
+                digest.feed(response.content)
+                try:
+                    response_body = response.json()
+                except:
+                    response_body = response.text
 
-            response_time_ms = (time.time() - start_time) * 1000
-            actual_status = response.status_code
+            response_time_ms = (time.perf_counter() - start_time) * 1000
 
-            try:
-                response_body = response.json()
-            except:
-                response_body = response.text
-
-            # 根據測試策略驗證結果
-            validation_errors = []
-            
-            if test_strategy == "liveness_probe":
-                # 存活性探測：400 或 422 視為成功
-                is_success = actual_status in [400, 422]
-                if not is_success:
-                    validation_errors.append(f"存活性探測預期 400/422，實際為 {actual_status}")
-            else:
-                # full_call：預期狀態碼必須完全相符
-                is_success = actual_status == expected_status
-
-            # 檢查回應時間
-            if response_time_ms > self.sla_threshold_ms:
-                validation_errors.append(f"回應時間 {response_time_ms:.0f}ms 超過 SLA 閾值 {self.sla_threshold_ms}ms")
-
-            # 檢查響應結構 (僅 full_call 策略)
-            if test_strategy == "full_call" and isinstance(expected_response, dict) and isinstance(response_body, dict):
-                for key in expected_response.keys():
-                    if key not in ["note", "items"] and key not in response_body:
-                        validation_errors.append(f"響應缺少欄位: {key}")
-
-            # 過濾敏感資料用於報告輸出
-            safe_params = self._mask_sensitive_params(request_params)
-
-            return ApiTestResult(
-                endpoint=endpoint,
-                method=method,
-                expected_status=expected_status,
-                actual_status=actual_status,
-                response_time_ms=response_time_ms,
-                is_success=is_success and len(validation_errors) == 0,
-                test_strategy=test_strategy,
-                response_body=response_body,
-                validation_errors=validation_errors,
-                request_params=safe_params
-            )
+            # response.elapsed 為送出請求到解析完回應標頭的時間，其後為本體下載
+            headers_ms = response.elapsed.total_seconds() * 1000
+            timings = self._phase_timings(phases, headers_ms, response_time_ms)
+            return self._evaluate_response(plan, safe_params, response.status_code, response_body, response_time_ms,
+                                           timings, digest)
 
         except requests.exceptions.Timeout:
-            safe_params = self._mask_sensitive_params(request_params)
-            return ApiTestResult(
-                endpoint=endpoint,
-                method=method,
-                expected_status=expected_status,
-                actual_status=0,
-                response_time_ms=(time.time() - start_time) * 1000,
-                is_success=False,
-                error_message="請求超時",
-                request_params=safe_params
-            )
+            response_time_ms = (time.perf_counter() - start_time) * 1000
+            return self._error_result(plan, safe_params, "請求超時", response_time_ms,
+                                      self._phase_timings(phases, response_time_ms, response_time_ms))
         except Exception as e:
-            safe_params = self._mask_sensitive_params(request_params)
-            return ApiTestResult(
-                endpoint=endpoint,
-                method=method,
-                expected_status=expected_status,
-                actual_status=0,
-                response_time_ms=(time.time() - start_time) * 1000,
-                is_success=False,
-                error_message=str(e),
-                request_params=safe_params
-            )
+            response_time_ms = (time.perf_counter() - start_time) * 1000
+            return self._error_result(plan, safe_params, str(e), response_time_ms,
+                                      self._phase_timings(phases, response_time_ms, response_time_ms))
+        finally:
+            _phase_local.phases = None
+            if gate is not None:
+                gate.release(full_url)
+
+    def _new_digest(self, plan: "ProbePlan") -> ResponseDigest:
+        """建立回應摘要；僅 full_call 需要掃描 actualResponse 的頂層欄位"""
+        expected_keys = set()
+        if self.stream_responses and plan.test_strategy == "full_call":
+            expected_keys = plan.expected_keys
+        max_bytes = self.max_body_bytes if self.stream_responses else 0
+        return ResponseDigest(max_bytes, expected_keys)
+
+    @staticmethod
+    def _phase_timings(phases: Dict[str, float], headers_ms: float, total_ms: float) -> ProbeTimings:
+        """由連線階段記錄與標頭/總耗時推算各階段耗時"""
+        dns_ms = phases.get("dns_ms", 0.0)
+        connect_ms = phases.get("connect_ms", 0.0)
+        tls_ms = phases.get("tls_ms", 0.0)
+        headers_ms = min(headers_ms, total_ms)
+        return ProbeTimings(
+            dns_ms=dns_ms,
+            connect_ms=connect_ms,
+            tls_ms=tls_ms,
+            ttfb_ms=max(0.0, headers_ms - dns_ms - connect_ms - tls_ms),
+            body_ms=max(0.0, total_ms - headers_ms)
+        )
+
+    async def test_api_async(self, client: "aiohttp.ClientSession", api_info: Dict) -> ApiTestResult:
+        """以 asyncio 測試單一 API（驗證、重試與斷路邏輯與 test_api 相同）"""
+        plan, request_params, safe_params = self._resolve_plan(api_info)
+        result: Optional[ApiTestResult] = None
+        attempt = 0
+        while True:
+            blocked = self._preflight(plan, safe_params, check_circuit=attempt == 0)
+            if blocked is not None:
+                result = result or blocked
+                break
+
+            if self.metrics is not None:
+                self.metrics.probe_started()
+            try:
+                result = await self._probe_once_async(client, plan, request_params, safe_params,
+                                                      self._attempt_timeout())
+            finally:
+                if self.metrics is not None:
+                    self.metrics.probe_finished()
+            attempt += 1
+            delay = self._after_attempt(plan, result, attempt)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+
+        self._record_circuit(plan, result, attempt)
+        result.attempts = attempt
+        return result
+
+    @staticmethod
+    def _query_pairs(params: Dict) -> List[tuple]:
+        """依 requests 的規則編碼查詢參數：None 省略、清單展開為重複的鍵，其餘值轉為字串"""
+        pairs = []
+        for key, values in params.items():
+            if isinstance(values, (str, bytes)) or not hasattr(values, "__iter__"):
+                values = [values]
+            for value in values:
+                if value is None:
+                    continue
+                pairs.append((key, value.decode("utf-8") if isinstance(value, bytes) else str(value)))
+        return pairs
+
+    async def _probe_once_async(self, client: "aiohttp.ClientSession", plan: "ProbePlan", request_params: Dict,
+                                safe_params: Dict, timeout: float) -> ApiTestResult:
+        """以 aiohttp 送出一次請求並驗證回應"""
+        full_url = plan.full_url
+        method = plan.method
+
+        kwargs: Dict[str, Any] = {}
+        if method == "GET":
+            kwargs["params"] = self._query_pairs(request_params)
+        elif method != "DELETE":
+            kwargs["json"] = request_params
+
+        # 由 TraceConfig 回呼寫入各階段時間點 (aiohttp 的連線時間已包含 TLS 握手)
+        phases: Dict[str, float] = {}
+        start_time = time.perf_counter()
+
+        try:
+            digest = self._new_digest(plan)
+            async with client.request(method, full_url, trace_request_ctx=phases,
+                                      timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as response:
+                headers_ms = (time.perf_counter() - start_time) * 1000
+                actual_status = response.status
+                if self.stream_responses:
+                    # 邊下載邊計算，超過上限即停止讀取
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        if not digest.feed(chunk):
+                            break
+                    raw = None
+                else:
+                    raw = await response.read()
+                    digest.feed(raw)
+                response_time_ms = (time.perf_counter() - start_time) * 1000
+
+            response_body = None
+            if raw is not None:
+                text = raw.decode(response.charset or "utf-8", errors="replace")
+                try:
+                    response_body = json.loads(text)
+                except ValueError:
+                    response_body = text
+
+            timings = self._phase_timings(phases, headers_ms, response_time_ms)
+            return self._evaluate_response(plan, safe_params, actual_status, response_body, response_time_ms,
+                                           timings, digest)
+
+        except asyncio.TimeoutError:
+            response_time_ms = (time.perf_counter() - start_time) * 1000
+            return self._error_result(plan, safe_params, "請求超時", response_time_ms,
+                                      self._phase_timings(phases, response_time_ms, response_time_ms))
+        except Exception as e:
+            response_time_ms = (time.perf_counter() - start_time) * 1000
+            return self._error_result(plan, safe_params, str(e), response_time_ms,
+                                      self._phase_timings(phases, response_time_ms, response_time_ms))
 
     def run_tests(self, api_record_path: str) -> HealthReport:
         """執行所有 API 測試"""
-        # 載入 API 記錄
-        with open(api_record_path, "r", encoding="utf-8") as f:
-            api_record = json.load(f)
-
-        test_info = api_record.get("testInfo", {})
-        page_flows = api_record.get("pageFlows", [])
+        # 載入 API 記錄 (可串流讀取時邊讀邊測試)
+        reader = RecordReader(api_record_path)
+        test_info = reader.test_info()
 
         report = HealthReport(
             test_date=datetime.now().isoformat(),
             environment=test_info.get("environment", "")
         )
 
-        # 先執行登入
-        if not self.login():
+        if self.metrics is not None:
+            self.metrics.run_started()
+
+        # 先執行登入 (多行程模式由各工作行程自行登入)
+        if self.engine != "process" and not self.login():
             report.critical_failures.append("登入失敗，無法繼續測試")
+            if self.metrics is not None:
+                self.metrics.run_finished(report.health_score)
             return report
 
-        total_response_time = 0.0
+        apis = self._iter_apis(reader.iter_flows())
+        extra_references: Dict[tuple, List[str]] = {}
+        if self.coalesce_probes:
+            apis = self._coalesce_probes(apis, extra_references)
+        if self.probe_state is not None:
+            apis = self._select_incremental(apis, report)
+
+        probed_plans: List[ProbePlan] = []
+        if reader.streaming and self.engine == "thread":
+            # 串流模式：記錄項目邊解析邊送入執行緒池，記憶體只與進行中的工作量有關
+            print("\n[測試] 串流讀取記錄檔，邊讀取邊測試")
+
+            def track(items):
+                for flow_name, plan in items:
+                    probed_plans.append(plan)
+                    yield flow_name, plan
+
+            # 只有增量模式需要保留計畫以便更新端點狀態
+            apis_to_test = track(apis) if self.probe_state is not None else apis
+        else:
+            apis_to_test = list(apis)
+            if self.probe_state is not None:
+                probed_plans = [plan for _, plan in apis_to_test]
+            print(f"\n[測試] 共收集 {len(apis_to_test)} 個 API 待測試")
+
+        if self.sweep_budget_seconds:
+            self.sweep_deadline = time.monotonic() + self.sweep_budget_seconds
+        try:
+            report = self._execute_tests(apis_to_test, report)
+        finally:
+            self.sweep_deadline = None
+
+        report.unique_probes = report.total_apis
+        if extra_references:
+            self._fan_out_results(report, extra_references)
+        report.referenced_probes = report.total_apis
+
+        if self.latency_baseline is not None:
+            self._detect_regressions(report)
+        if self.metrics is not None:
+            self.metrics.run_finished(report.health_score)
+
+        self._save_schema_cache()
+        if self.probe_state is not None:
+            print(f"[增量] 略過 {report.incremental_skipped} 個穩定端點")
+            self._update_incremental(probed_plans, report)
+
+        return report
+
+    def _execute_tests(self, apis_to_test: List, report: HealthReport) -> HealthReport:
+        """依執行引擎執行測試"""
+        # 並行執行測試
+        if self.engine == "process":
+            print(f"[測試] 使用 {self.processes} 個工作行程，各 {self.parallel_workers} 個執行緒")
+            return self._run_tests_processes(apis_to_test, report)
+
+        if self.engine == "async":
+            print(f"[測試] 使用 asyncio 引擎，並行上限 {self.async_concurrency}")
+            report = self._run_tests_async(apis_to_test, report)
+            return report
+
+        # 串流模式無法事先得知所有主機，只預熱設定檔中的主機
+        hosts = self._collect_hosts(apis_to_test) if isinstance(apis_to_test, list) else self._base_url_hosts()
+        report.connections_warmed = self._warm_up_connections(hosts, self.parallel_workers)
+        if report.connections_warmed:
+            print(f"[連線] 已預熱 {report.connections_warmed} 條連線")
+        opened_before, sent_before = self._connection_stats()
 
-        # 收集所有需要測試的 API
-        apis_to_test = []
+        if self.parallel_workers > 1:
+            print(f"[測試] 使用 {self.parallel_workers} 個並行執行緒")
+            report = self._run_tests_parallel(apis_to_test, report)
+        else:
+            print("[測試] 使用序列模式執行")
+            report = self._run_tests_sequential(apis_to_test, report)
+
+        opened_after, sent_after = self._connection_stats()
+        report.connections_opened = opened_after - opened_before
+        report.connections_reused = max(0, (sent_after - sent_before) - report.connections_opened)
+
+        return report
+
+    @staticmethod
+    def _coalesce_key(plan_or_result) -> tuple:
+        """合併相同請求的鍵：請求指紋 + 預期狀態碼 + 測試策略 (預期不同時分開探測)"""
+        return plan_or_result.fingerprint, plan_or_result.expected_status, plan_or_result.test_strategy
+
+    def _coalesce_probes(self, apis_to_test: Iterable[tuple],
+                         extra_references: Dict[tuple, List[str]]) -> Iterator[tuple]:
+        """只產生每個相同請求的第一次出現，其餘引用的頁面流程記入 extra_references"""
+        seen = set()
+        for flow_name, plan in apis_to_test:
+            key = self._coalesce_key(plan)
+            if key in seen:
+                extra_references.setdefault(key, []).append(flow_name)
+                continue
+            seen.add(key)
+            yield flow_name, plan
+
+    def _fan_out_results(self, report: HealthReport, extra_references: Dict[tuple, List[str]]):
+        """將合併探測的結果複製給其他引用相同請求的頁面流程"""
+        probed = {}
+        for result in report.results:
+            probed.setdefault(self._coalesce_key(result), result)
+
+        for key, flow_names in extra_references.items():
+            result = probed.get(key)
+            if result is None:  # 增量模式略過或未執行
+                continue
+            for flow_name in flow_names:
+                shared = copy.copy(result)
+                shared.page_flow = flow_name
+                shared.coalesced = True
+                report.results.append(shared)
+                report.total_apis += 1
+                # 只計入頁面流程的直方圖，整體與端點分佈不重複計算同一次請求
+                histogram = report.flow_histograms.get(flow_name)
+                if histogram is None:
+                    histogram = report.flow_histograms[flow_name] = LatencyHistogram()
+                histogram.record(shared.response_time_ms)
+                self._print_result(shared, report)
+
+        # 平均回應時間只計入實際送出的請求，合併請求的複本不重複計算
+        sent = [r for r in report.results if not r.coalesced and not r.not_probed]
+        self._finalize_report(report, sum(r.response_time_ms for r in sent), len(sent))
+
+    def _select_incremental(self, apis_to_test: Iterable[tuple], report: HealthReport) -> Iterator[tuple]:
+        """增量模式：只保留本次需要探測的端點"""
+        for flow_name, plan in apis_to_test:
+            if self.probe_state.should_probe(plan, self.sla_threshold_ms):
+                yield flow_name, plan
+            else:
+                self.probe_state.mark_skipped(plan)
+                report.incremental_skipped += 1
+
+    def _update_incremental(self, probed_plans: List["ProbePlan"], report: HealthReport):
+        """以本次結果更新端點狀態並存檔"""
+        plans = {plan.fingerprint: plan for plan in probed_plans}
+        for result in report.results:
+            plan = plans.get(result.fingerprint)
+            if plan is not None and not result.coalesced and not result.not_probed:
+                self.probe_state.update(plan, result)
+        self.probe_state.save()
+
+    def _collect_apis(self, page_flows: Iterable[Dict], default_interval: Optional[float] = None) -> List[tuple]:
+        """收集所有需要測試的 API，回傳 (頁面流程名稱, ProbePlan) 清單"""
+        apis_to_test = list(self._iter_apis(page_flows, default_interval))
+        self._save_schema_cache()
+        return apis_to_test
+
+    def _save_schema_cache(self):
+        """寫回結構快取；寫入失敗只影響下次是否需要重新推斷，不中斷測試"""
+        if self.schema_cache is None:
+            return
+        try:
+            self.schema_cache.save()
+        except OSError as e:
+            print(f"[結構] 快取寫入失敗: {e}")
+
+    def _iter_apis(self, page_flows: Iterable[Dict], default_interval: Optional[float] = None) -> Iterator[tuple]:
+        """逐一產生需要測試的 API (頁面流程名稱, ProbePlan)"""
         for flow in page_flows:
             flow_name = flow.get("pageFlow", "")
             api_calls = flow.get("apiCalls", [])
+            flow_interval = flow.get("intervalSeconds", default_interval)
 
             for api in api_calls:
                 endpoint = api.get("endpoint", "")
@@ -329,21 +2623,226 @@ class ApiHealthTester:
                     print(f"  [SKIP] {api.get('method', 'GET')} {endpoint}")
                     continue
 
-                apis_to_test.append((flow_name, api))
+                yield flow_name, self.compile_plan(api, flow_interval)
 
-        print(f"\n[測試] 共收集 {len(apis_to_test)} 個 API 待測試")
-        
-        # 並行執行測試
-        if self.parallel_workers > 1:
-            print(f"[測試] 使用 {self.parallel_workers} 個並行執行緒")
-            report = self._run_tests_parallel(apis_to_test, report)
-        else:
-            print("[測試] 使用序列模式執行")
-            report = self._run_tests_sequential(apis_to_test, report)
+    def run_daemon(self, api_record_path: str, output_path: str, default_interval: float = 60.0,
+                   stop_event: Optional[threading.Event] = None, store: Optional[ResultStore] = None):
+        """常駐監控模式：維持同一個登入 session，依各 API 的間隔排程探測並逐筆寫出結果 (NDJSON)"""
+        stop_event = stop_event or threading.Event()
+        apis_to_test = self._collect_apis(RecordReader(api_record_path).iter_flows(), default_interval)
+        if not apis_to_test:
+            print("[常駐] 沒有需要監控的 API")
+            return
+        if not self.login():
+            print("[常駐] 登入失敗，無法啟動監控")
+            return
+
+        print(f"[常駐] 監控 {len(apis_to_test)} 個 API，結果寫入 {output_path}")
+        if self.metrics is not None:
+            self.metrics.run_started()  # 常駐模式的執行時間即為持續監控時間
+
+        # 以 (下次執行時間, 序號) 為鍵的 heap 排程；起始時間平均錯開，避免同時湧入
+        start = time.monotonic()
+        spread = min(plan.interval_seconds or default_interval for _, plan in apis_to_test)
+        schedule = [
+            (start + spread * index / len(apis_to_test), index, flow_name, plan)
+            for index, (flow_name, plan) in enumerate(apis_to_test)
+        ]
+        heapq.heapify(schedule)
+
+        in_flight = set()
+        state_lock = threading.Lock()
+        relogin_needed = threading.Event()
+        next_login_attempt = 0.0
+
+        def probe(index: int, flow_name: str, plan: ProbePlan):
+            try:
+                result = self.test_api(plan)
+                result.page_flow = flow_name
+                if result.actual_status == 401:
+                    relogin_needed.set()
+                line = json.dumps({
+                    "timestamp": datetime.now().isoformat(),
+                    **self._result_to_dict(result)
+                }, ensure_ascii=False)
+                with state_lock:
+                    out.write(line + "\n")
+                    out.flush()
+                if store is not None:
+                    store.append(result)
+                if self.metrics is not None:
+                    self.metrics.observe(result)
+                status_icon = "[SKIP]" if result.not_probed else "[OK]" if result.is_success else "[FAIL]"
+                print(f"  {status_icon} {result.method} {result.endpoint} "
+                      f"{result.actual_status} {result.response_time_ms:.0f}ms")
+            except Exception as e:
+                print(f"  [ERROR] 測試執行錯誤: {str(e)}")
+            finally:
+                with state_lock:
+                    in_flight.discard(index)
+                    if self.metrics is not None:
+                        self.metrics.set_queue_depth(len(in_flight))
+
+        with open(output_path, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=max(1, self.parallel_workers)) as executor:
+            try:
+                while not stop_event.is_set():
+                    now = time.monotonic()
+
+                    # Token 到期前或收到 401 時重新登入；失敗則 30 秒後再試
+                    if now >= next_login_attempt:
+                        if relogin_needed.is_set():
+                            relogin_needed.clear()
+                            self.token = None
+                        if not self.ensure_token_fresh():
+                            next_login_attempt = now + 30
+
+                    due_at, index, flow_name, plan = schedule[0]
+                    if due_at > now:
+                        stop_event.wait(min(due_at - now, 1.0))
+                        continue
+
+                    # 以預定時間累加間隔，避免排程漂移
+                    interval = plan.interval_seconds or default_interval
+                    heapq.heapreplace(schedule, (max(due_at + interval, now), index, flow_name, plan))
+
+                    with state_lock:
+                        if index in in_flight:
+                            continue  # 上一次探測尚未完成，跳過本輪
+                        in_flight.add(index)
+                        if self.metrics is not None:
+                            self.metrics.set_queue_depth(len(in_flight))
+                    executor.submit(probe, index, flow_name, plan)
+            except KeyboardInterrupt:
+                print("\n[常駐] 收到中斷訊號，等待進行中的探測完成...")
+                stop_event.set()
+
+        if store is not None:
+            store.flush()
+
+    def run_load_test(self, api_record_path: str, users: int = 10, duration_seconds: float = 60.0,
+                      ramp_up_seconds: float = 0.0, target_rps: Optional[float] = None,
+                      think_time_seconds: float = 1.0, window_seconds: float = 1.0) -> Dict:
+        """負載測試模式：以虛擬使用者依序重播頁面流程，回報吞吐量、延遲百分位數與錯誤率的時間序列
 
-        return report
+        Args:
+            users: 虛擬使用者數量
+            duration_seconds: 總測試時間 (含爬升)
+            ramp_up_seconds: 由 1 位爬升到全部虛擬使用者所需時間
+            target_rps: 全體每秒請求數上限 (None = 不限制)
+            think_time_seconds: 同一流程中兩次呼叫之間的平均思考時間 (±50% 隨機)
+            window_seconds: 時間序列的統計區間
+        """
+        reader = RecordReader(api_record_path)
+        if not self.login():
+            raise RuntimeError("登入失敗，無法進行負載測試")
+
+        # 依頁面流程分組，保留錄製時的呼叫順序
+        flows: Dict[str, List[ProbePlan]] = {}
+        for flow_name, plan in self._collect_apis(reader.iter_flows()):
+            flows.setdefault(flow_name, []).append(plan)
+        flow_list = list(flows.items())
+        if not flow_list:
+            raise RuntimeError("記錄檔中沒有可重播的頁面流程")
+
+        # 每位虛擬使用者各自持有一條連線
+        if self.pool_maxsize < users:
+            self.pool_maxsize = users
+            self._configure_connection_pool()
+
+        rate_limiter = RateLimiter(target_rps) if target_rps else None
+        overall = LatencyHistogram()
+        windows: Dict[int, Dict] = {}
+        stats_lock = threading.Lock()
+        active_users = [0]
+        start = time.monotonic()
+        deadline = start + duration_seconds
+        stop_event = threading.Event()
+
+        def record(result: ApiTestResult):
+            window = int((time.monotonic() - start) // window_seconds)
+            with stats_lock:
+                stats = windows.get(window)
+                if stats is None:
+                    stats = windows[window] = {"requests": 0, "errors": 0, "users": 0,
+                                               "histogram": LatencyHistogram()}
+                stats["requests"] += 1
+                stats["errors"] += 0 if result.is_success else 1
+                stats["users"] = max(stats["users"], active_users[0])
+                stats["histogram"].record(result.response_time_ms)
+                overall.record(result.response_time_ms)
+
+        def virtual_user(user_index: int):
+            # 爬升期間依序啟動
+            if users > 1 and ramp_up_seconds > 0:
+                if stop_event.wait(ramp_up_seconds * user_index / (users - 1)):
+                    return
+            with stats_lock:
+                active_users[0] += 1
+
+            iteration = 0
+            try:
+                while time.monotonic() < deadline:
+                    _, plans = flow_list[(user_index + iteration) % len(flow_list)]
+                    iteration += 1
+                    for plan in plans:
+                        if rate_limiter is not None and not rate_limiter.acquire(deadline):
+                            return
+                        if time.monotonic() >= deadline:
+                            return
+                        # 重試與斷路會掩蓋錯誤率與延遲，負載測試每個請求只送一次
+                        record(self.test_api(plan, resilient=False))
+                        if think_time_seconds > 0:
+                            stop_event.wait(think_time_seconds * random.uniform(0.5, 1.5))
+            finally:
+                with stats_lock:
+                    active_users[0] -= 1
+
+        print(f"[負載] {users} 位虛擬使用者，{len(flow_list)} 個頁面流程，持續 {duration_seconds:.0f} 秒"
+              + (f"，目標 {target_rps} rps" if target_rps else ""))
+
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            list(executor.map(virtual_user, range(users)))
+        stop_event.set()
+        elapsed = max(time.monotonic() - start, 1e-9)
+
+        timeline = []
+        for window in sorted(windows):
+            stats = windows[window]
+            histogram = stats["histogram"]
+            timeline.append({
+                "offsetSeconds": round(window * window_seconds, 3),
+                "activeUsers": stats["users"],
+                "requests": stats["requests"],
+                "throughputRps": round(stats["requests"] / window_seconds, 2),
+                "errorRate": round(stats["errors"] / stats["requests"], 4),
+                "p50Ms": round(histogram.percentile(50), 2),
+                "p90Ms": round(histogram.percentile(90), 2),
+                "p99Ms": round(histogram.percentile(99), 2),
+            })
+
+        total_requests = sum(stats["requests"] for stats in windows.values())
+        total_errors = sum(stats["errors"] for stats in windows.values())
+        return {
+            "testDate": datetime.now().isoformat(),
+            "environment": reader.test_info().get("environment", ""),
+            "settings": {
+                "users": users,
+                "durationSeconds": duration_seconds,
+                "rampUpSeconds": ramp_up_seconds,
+                "targetRps": target_rps,
+                "thinkTimeSeconds": think_time_seconds,
+            },
+            "summary": {
+                "totalRequests": total_requests,
+                "throughputRps": round(total_requests / elapsed, 2),
+                "errorRate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+                "latencyPercentiles": self._percentile_summary(overall),
+            },
+            "timeline": timeline,
+        }
 
-    def _run_tests_sequential(self, apis_to_test: List, report: HealthReport) -> HealthReport:
+    def _run_tests_sequential(self, apis_to_test: Iterable[tuple], report: HealthReport) -> HealthReport:
         """序列執行測試"""
         total_response_time = 0.0
         current_flow = ""
@@ -358,17 +2857,15 @@ class ApiHealthTester:
             report.results.append(result)
             report.total_apis += 1
             total_response_time += result.response_time_ms
+            self._record_latency(report, flow_name, result)
+            if self.metrics is not None and isinstance(apis_to_test, list):
+                self.metrics.set_queue_depth(len(apis_to_test) - report.total_apis)
 
             self._print_result(result, report)
 
-        # 計算統計
-        if report.total_apis > 0:
-            report.avg_response_time_ms = total_response_time / report.total_apis
-            report.health_score = (report.success_count / report.total_apis) * 100
-
-        return report
+        return self._finalize_report(report, total_response_time)
 
-    def _run_tests_parallel(self, apis_to_test: List, report: HealthReport) -> HealthReport:
+    def _run_tests_parallel(self, apis_to_test: Iterable[tuple], report: HealthReport) -> HealthReport:
         """並行執行測試"""
         total_response_time = 0.0
         results_lock = threading.Lock()
@@ -379,41 +2876,298 @@ class ApiHealthTester:
             result = self.test_api(api)
             return flow_name, result
 
+        def handle(future):
+            nonlocal total_response_time
+            try:
+                flow_name, result = future.result()
+
+                with results_lock:
+                    report.results.append(result)
+                    report.total_apis += 1
+                    total_response_time += result.response_time_ms
+                    self._record_latency(report, flow_name, result)
+
+                with print_lock:
+                    self._print_result(result, report)
+
+            except Exception as e:
+                print(f"  [ERROR] 測試執行錯誤: {str(e)}")
+
+        # 限制已送出但未完成的工作數，讓串流讀取的記錄檔不必全部載入
+        max_in_flight = self.parallel_workers * 2
         with ThreadPoolExecutor(max_workers=self.parallel_workers) as executor:
-            futures = {executor.submit(test_single_api, item): item for item in apis_to_test}
-            
-            for future in as_completed(futures):
-                try:
-                    flow_name, result = future.result()
-                    
-                    with results_lock:
-                        report.results.append(result)
-                        report.total_apis += 1
-                        total_response_time += result.response_time_ms
-                    
-                    with print_lock:
-                        self._print_result(result, report)
+            metrics = self.metrics
+            pending = set()
+            for item in apis_to_test:
+                pending.add(executor.submit(test_single_api, item))
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle(future)
+                if metrics is not None:
+                    metrics.set_queue_depth(len(pending))
+
+            remaining = len(pending)
+            for future in as_completed(pending):
+                handle(future)
+                remaining -= 1
+                if metrics is not None:
+                    metrics.set_queue_depth(remaining)
+
+        return self._finalize_report(report, total_response_time)
+
+    def _run_tests_processes(self, apis_to_test: List, report: HealthReport) -> HealthReport:
+        """多行程執行測試：端點清單分片給各工作行程，父行程合併結果串流"""
+        total_response_time = 0.0
+        shard_count = max(1, min(self.processes, len(apis_to_test)))
+        # 交錯分片，讓各頁面流程平均分散到各行程
+        shards = [apis_to_test[i::shard_count] for i in range(shard_count)]
+        settings = {
+            "parallel_workers": self.parallel_workers,
+            "stream_responses": self.stream_responses,
+            "max_body_bytes": self.max_body_bytes,
+            "max_retries": self.max_retries,
+            "budget_seconds": self._remaining_budget(),
+            "token_cache_path": self.token_cache.cache_path if self.token_cache is not None else None,
+        }
+
+        context = multiprocessing.get_context()
+        result_queue = context.Queue()
+        workers = [
+            context.Process(target=_process_shard_worker, args=(self.config, settings, shard, result_queue),
+                            daemon=True)
+            for shard in shards
+        ]
+        for worker in workers:
+            worker.start()
+
+        # 斷路與並行上限由各工作行程各自維護，父行程的斷路器與限制器不會被使用
+        open_circuits = set()
+        concurrency_limits = []
+        remaining = len(workers)
+        while remaining:
+            try:
+                kind, first, second = result_queue.get(timeout=1)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    report.critical_failures.append(f"{remaining} 個工作行程異常結束")
+                    break
+                continue
+
+            if kind == "result":
+                flow_name, result = first, second
+                report.results.append(result)
+                report.total_apis += 1
+                if self.metrics is not None:
+                    self.metrics.set_queue_depth(len(apis_to_test) - report.total_apis)
+                total_response_time += result.response_time_ms
+                self._record_latency(report, flow_name, result)
+                self._print_result(result, report)
+            elif kind == "error":
+                report.critical_failures.append(first)
+            elif kind == "done":
+                remaining -= 1
+                report.connections_opened += first["opened"]
+                report.connections_reused += first["reused"]
+                open_circuits.update(first["open_circuits"])
+                if first["concurrency_limit"] is not None:
+                    concurrency_limits.append(first["concurrency_limit"])
+
+        for worker in workers:
+            worker.join()
+
+        report = self._finalize_report(report, total_response_time)
+        report.open_circuits = sorted(open_circuits)
+        # 各行程上限的總和即為整體的並行上限
+        report.concurrency_limit = sum(concurrency_limits) if concurrency_limits else None
+        return report
 
+    def _run_tests_async(self, apis_to_test: List, report: HealthReport) -> HealthReport:
+        """以 asyncio 執行測試（單一執行緒、有上限的並行請求）"""
+        if aiohttp is None:
+            raise RuntimeError("async 引擎需要 aiohttp，請執行: pip install aiohttp")
+        return asyncio.run(self._run_tests_async_main(apis_to_test, report))
+
+    async def _run_tests_async_main(self, apis_to_test: List, report: HealthReport) -> HealthReport:
+        """async 引擎主流程"""
+        total_response_time = 0.0
+        semaphore = asyncio.Semaphore(self.async_concurrency)
+        connection_counts = {"opened": 0, "reused": 0}
+
+        async def on_connection_create(session, ctx, params):
+            connection_counts["opened"] += 1
+
+        async def on_connection_reuse(session, ctx, params):
+            connection_counts["reused"] += 1
+
+        def phase_marker(start_key, end_key=None):
+            """產生把時間點/耗時寫進 trace_request_ctx 的回呼"""
+
+            async def callback(session, ctx, params):
+                phases = ctx.trace_request_ctx
+                if not isinstance(phases, dict):
+                    return
+                now = time.perf_counter()
+                if end_key is None:
+                    phases[start_key] = now
+                elif start_key in phases:
+                    elapsed_ms = (now - phases.pop(start_key)) * 1000
+                    if end_key == "connect_ms":
+                        # aiohttp 的連線建立時間包含 DNS 解析，扣除以免重複計算
+                        elapsed_ms = max(0.0, elapsed_ms - phases.get("dns_ms", 0.0))
+                    phases[end_key] = phases.get(end_key, 0.0) + elapsed_ms
+
+            return callback
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_connection_create)
+        trace_config.on_connection_reuseconn.append(on_connection_reuse)
+        trace_config.on_dns_resolvehost_start.append(phase_marker("_dns_start"))
+        trace_config.on_dns_resolvehost_end.append(phase_marker("_dns_start", "dns_ms"))
+        trace_config.on_connection_create_start.append(phase_marker("_connect_start"))
+        trace_config.on_connection_create_end.append(phase_marker("_connect_start", "connect_ms"))
+
+        # 沿用登入後 requests.Session 的 headers 與 cookies（含 Authorization）
+        connector = aiohttp.TCPConnector(
+            ssl=False,
+            limit=self.async_concurrency,
+            limit_per_host=self.config.get("pool_maxsize", 0),
+            keepalive_timeout=60
+        )
+        async with aiohttp.ClientSession(
+            headers=dict(self.session.headers),
+            cookies=self.session.cookies.get_dict(),
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            trace_configs=[trace_config],
+        ) as client:
+
+            if self.pool_warmup:
+                await self._warm_up_connections_async(client, apis_to_test)
+                report.connections_warmed = connection_counts["opened"]
+                connection_counts.update(opened=0, reused=0)
+                if report.connections_warmed:
+                    print(f"[連線] 已預熱 {report.connections_warmed} 條連線")
+
+            async def test_single_api(flow_name, api):
+                async with semaphore:
+                    return flow_name, await self.test_api_async(client, api)
+
+            tasks = [asyncio.create_task(test_single_api(flow_name, api)) for flow_name, api in apis_to_test]
+
+            remaining = len(tasks)
+            for next_done in asyncio.as_completed(tasks):
+                remaining -= 1
+                if self.metrics is not None:
+                    self.metrics.set_queue_depth(remaining)
+                try:
+                    flow_name, result = await next_done
+                    report.results.append(result)
+                    report.total_apis += 1
+                    total_response_time += result.response_time_ms
+                    self._record_latency(report, flow_name, result)
+                    self._print_result(result, report)
                 except Exception as e:
                     print(f"  [ERROR] 測試執行錯誤: {str(e)}")
 
-        # 計算統計
-        if report.total_apis > 0:
-            report.avg_response_time_ms = total_response_time / report.total_apis
-            report.health_score = (report.success_count / report.total_apis) * 100
+        report.connections_opened = connection_counts["opened"]
+        report.connections_reused = connection_counts["reused"]
+        return self._finalize_report(report, total_response_time)
+
+    async def _warm_up_connections_async(self, client: "aiohttp.ClientSession", apis_to_test: List):
+        """async 引擎的連線預熱"""
 
+        async def touch(root_url):
+            try:
+                async with client.head(root_url, allow_redirects=False,
+                                       timeout=aiohttp.ClientTimeout(total=10)) as response:
+                    await response.read()
+            except Exception:
+                pass  # 預熱失敗不影響後續測試
+
+        touches = []
+        for host, root_url in self._collect_hosts(apis_to_test).items():
+            count = max(1, min(self.async_concurrency, self._pool_size_for(host)))
+            touches.extend(touch(root_url) for _ in range(count))
+        await asyncio.gather(*touches)
+
+    @staticmethod
+    def _record_latency(report: HealthReport, flow_name: str, result: ApiTestResult):
+        """將結果的回應時間記入整體、頁面流程與端點的直方圖"""
+        result.page_flow = flow_name
+        if result.not_probed:
+            return  # 未送出請求，沒有回應時間
+        report.latency_histogram.record(result.response_time_ms)
+        for histograms, key in ((report.flow_histograms, flow_name),
+                                (report.endpoint_histograms, result.endpoint)):
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = LatencyHistogram()
+            histogram.record(result.response_time_ms)
+
+    @staticmethod
+    def _percentile_summary(histogram: LatencyHistogram) -> Dict:
+        """直方圖的 p50/p90/p99/max 摘要"""
+        return {
+            "count": histogram.total,
+            "p50Ms": round(histogram.percentile(50), 2),
+            "p90Ms": round(histogram.percentile(90), 2),
+            "p99Ms": round(histogram.percentile(99), 2),
+            "maxMs": round(histogram.max_ms, 2)
+        }
+
+    def _finalize_report(self, report: HealthReport, total_response_time: float,
+                         timed_count: Optional[int] = None) -> HealthReport:
+        """計算統計 (timed_count 為 total_response_time 涵蓋的請求數，預設為所有已探測的結果)"""
+        # 斷路或逾預算而未送出的請求不計入平均回應時間與健康度
+        probed_count = report.total_apis - report.not_probed_count
+        if timed_count is None:
+            timed_count = probed_count
+        if timed_count > 0:
+            report.avg_response_time_ms = total_response_time / timed_count
+        if probed_count > 0:
+            report.health_score = (report.success_count / probed_count) * 100
+        else:
+            # 全部略過 (增量模式、斷路或逾預算) 時無從判斷，不可回報為 0% 的全面故障
+            report.health_score = None
+
+        if self.circuit_breaker is not None:
+            report.open_circuits = self.circuit_breaker.open_hosts()
+        if self.concurrency_limiter is not None:
+            report.concurrency_limit = int(self.concurrency_limiter.limit)
         return report
 
     def _print_result(self, result: ApiTestResult, report: HealthReport):
         """列印單一測試結果"""
-        status_icon = "[OK]" if result.is_success else "[FAIL]"
+        status_icon = "[SKIP]" if result.not_probed else "[OK]" if result.is_success else "[FAIL]"
         strategy_label = f"[{result.test_strategy}]" if result.test_strategy != "full_call" else ""
         print(f"  {status_icon} {result.method} {result.endpoint} {strategy_label}")
-        print(f"    狀態: {result.actual_status} (預期: {result.expected_status})")
-        print(f"    回應時間: {result.response_time_ms:.0f}ms")
-
-        if result.is_success:
+        if result.not_probed:
+            print(f"    未探測: {result.error_message}")
+        else:
+            print(f"    狀態: {result.actual_status} (預期: {result.expected_status})")
+            print(f"    回應時間: {result.response_time_ms:.0f}ms")
+        if result.coalesced:
+            # 重試與斷路統計已隨原始探測計入
+            print(f"    沿用相同請求的結果 (頁面流程: {result.page_flow})")
+        else:
+            if result.attempts > 1:
+                print(f"    重試: 共嘗試 {result.attempts} 次")
+                report.retried_count += 1
+                report.retry_attempts += result.attempts - 1
+            if result.short_circuited:
+                report.short_circuited_count += 1
+            if result.budget_exhausted:
+                report.budget_skipped_count += 1
+
+        if result.not_probed:
+            # 未送出請求，既非成功也非失敗
+            report.not_probed_count += 1
+        elif result.is_success:
             report.success_count += 1
+        elif result.coalesced:
+            # 錯誤與警告已隨原始探測記錄，不重複列出
+            report.failure_count += 1
         else:
             report.failure_count += 1
             if result.error_message:
@@ -423,8 +3177,30 @@ class ApiHealthTester:
                 print(f"    警告: {err}")
                 report.warnings.append(f"{result.endpoint}: {err}")
 
+        if self.result_writer is not None:
+            self.result_writer.write(result)
+        if self.metrics is not None:
+            self.metrics.observe(result)
+
     def generate_report(self, report: HealthReport, output_path: str):
-        """產生報告檔案"""
+        """產生報告檔案 (啟用結果串流時另寫出摘要索引)"""
+        if self.write_full_report:
+            report_data = self._report_to_dict(report)
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(report_data, f, ensure_ascii=False, indent=2)
+            print(f"\n[報告] 已儲存至: {output_path}")
+
+        writer = self.result_writer
+        if writer is not None:
+            summary_data = self._report_to_dict(report, include_results=False)
+            # 每個端點的分位數在端點很多時體積龐大，摘要索引只保留整體與頁面流程
+            summary_data["summary"].pop("endpointLatencyPercentiles", None)
+            writer.close(summary_data)
+            print(f"[報告] 詳細結果: {writer.results_path}")
+            print(f"[報告] 摘要索引: {writer.summary_path}")
+
+    def _report_to_dict(self, report: HealthReport, include_results: bool = True) -> Dict:
+        """將報告轉為輸出格式"""
         report_data = {
             "testDate": report.test_date,
             "environment": report.environment,
@@ -433,31 +3209,68 @@ class ApiHealthTester:
                 "successCount": report.success_count,
                 "failureCount": report.failure_count,
                 "avgResponseTimeMs": round(report.avg_response_time_ms, 2),
-                "healthScore": f"{report.health_score:.1f}%"
+                "healthScore": f"{report.health_score:.1f}%" if report.health_score is not None else None,
+                "connectionsWarmed": report.connections_warmed,
+                "connectionsOpened": report.connections_opened,
+                "connectionsReused": report.connections_reused,
+                "incrementalSkipped": report.incremental_skipped,
+                "uniqueProbes": report.unique_probes,
+                "referencedProbes": report.referenced_probes,
+                "resilience": {
+                    "retriedProbes": report.retried_count,
+                    "retryAttempts": report.retry_attempts,
+                    "shortCircuited": report.short_circuited_count,
+                    "budgetSkipped": report.budget_skipped_count,
+                    "notProbed": report.not_probed_count,
+                    "openCircuits": report.open_circuits,
+                    "concurrencyLimit": report.concurrency_limit
+                },
+                "latencyPercentiles": self._percentile_summary(report.latency_histogram),
+                "flowLatencyPercentiles": {
+                    name: self._percentile_summary(h) for name, h in report.flow_histograms.items()
+                },
+                "endpointLatencyPercentiles": {
+                    name: self._percentile_summary(h) for name, h in report.endpoint_histograms.items()
+                }
             },
+            "performanceRegressions": report.performance_regressions,
             "criticalFailures": report.critical_failures,
-            "warnings": report.warnings,
-            "detailedResults": [
-                {
-                    "endpoint": r.endpoint,
-                    "method": r.method,
-                    "testStrategy": r.test_strategy,
-                    "expectedStatus": r.expected_status,
-                    "actualStatus": r.actual_status,
-                    "responseTimeMs": round(r.response_time_ms, 2),
-                    "isSuccess": r.is_success,
-                    "errorMessage": r.error_message,
-                    "validationErrors": r.validation_errors,
-                    "requestParams": r.request_params
-                }
-                for r in report.results
-            ]
+            "warnings": report.warnings
+        }
+        if include_results:
+            report_data["detailedResults"] = [self._result_to_dict(r) for r in report.results]
+        return report_data
+
+    @staticmethod
+    def _result_to_dict(r: ApiTestResult) -> Dict:
+        """將單一測試結果轉為報告格式"""
+        return {
+            "endpoint": r.endpoint,
+            "method": r.method,
+            "pageFlow": r.page_flow,
+            "testStrategy": r.test_strategy,
+            "expectedStatus": r.expected_status,
+            "actualStatus": r.actual_status,
+            "responseTimeMs": round(r.response_time_ms, 2),
+            "isSuccess": r.is_success,
+            "errorMessage": r.error_message,
+            "validationErrors": r.validation_errors,
+            "requestParams": r.request_params,
+            "responseBytes": r.response_size,
+            "responseSha256": r.response_sha256,
+            "responseTruncated": r.response_truncated,
+            "attempts": r.attempts,
+            "shortCircuited": r.short_circuited,
+            "budgetExhausted": r.budget_exhausted,
+            "coalesced": r.coalesced,
+            "timings": {
+                "dnsMs": round(r.timings.dns_ms, 2),
+                "connectMs": round(r.timings.connect_ms, 2),
+                "tlsMs": round(r.timings.tls_ms, 2),
+                "ttfbMs": round(r.timings.ttfb_ms, 2),
+                "bodyMs": round(r.timings.body_ms, 2)
+            }
         }
-
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(report_data, f, ensure_ascii=False, indent=2)
-
-        print(f"\n[報告] 已儲存至: {output_path}")
 
     def print_summary(self, report: HealthReport):
         """列印摘要"""
@@ -470,8 +3283,25 @@ class ApiHealthTester:
         print(f"總 API 數量:     {report.total_apis}")
         print(f"成功:            {report.success_count}")
         print(f"失敗:            {report.failure_count}")
+        if report.not_probed_count:
+            print(f"未探測:          {report.not_probed_count} (斷路或逾時間預算)")
         print(f"平均回應時間:    {report.avg_response_time_ms:.0f}ms")
-        print(f"健康度評分:      {report.health_score:.1f}%")
+        histogram = report.latency_histogram
+        print(f"回應時間分佈:    p50 {histogram.percentile(50):.0f}ms / p90 {histogram.percentile(90):.0f}ms / "
+              f"p99 {histogram.percentile(99):.0f}ms / max {histogram.max_ms:.0f}ms")
+        if report.health_score is not None:
+            print(f"健康度評分:      {report.health_score:.1f}%")
+        else:
+            print("健康度評分:      未知 (本次沒有實際送出的請求)")
+        print(f"連線 (預熱/新開/重用): {report.connections_warmed} / "
+              f"{report.connections_opened} / {report.connections_reused}")
+        if report.referenced_probes > report.unique_probes:
+            print(f"實際請求/引用:   {report.unique_probes} / {report.referenced_probes} (相同請求已合併)")
+        if report.retried_count or report.short_circuited_count or report.budget_skipped_count:
+            print(f"重試/斷路/逾預算: {report.retried_count} / {report.short_circuited_count} / "
+                  f"{report.budget_skipped_count}")
+        if report.open_circuits:
+            print(f"斷路中的主機:    {', '.join(report.open_circuits)}")
         print("-" * 60)
 
         if report.critical_failures:
@@ -484,12 +3314,119 @@ class ApiHealthTester:
             for warning in report.warnings:
                 print(f"  - {warning}")
 
-        if not report.critical_failures and not report.warnings:
+        if report.performance_regressions:
+            print("\n[Regression] 相對歷史基準明顯變慢:")
+            for regression in report.performance_regressions:
+                print(f"  - {regression['endpoint']}: {regression['responseTimeMs']:.0f}ms "
+                      f"(基準中位數 {regression['baselineMedianMs']:.0f}ms，z={regression['zScore']})")
+
+        if not report.critical_failures and not report.warnings and not report.performance_regressions:
             print("\n[OK] 所有 API 運作正常!")
 
         print("=" * 60)
 
 
+def _process_shard_worker(config: Dict, settings: Dict, shard: List[tuple], result_queue):
+    """多行程模式的工作行程：自行登入，以執行緒池探測分配到的 API，並逐筆回傳結果
+
+    結束時回傳連線數與本行程斷路器、自適應並行上限的狀態。
+    """
+    stats = {"opened": 0, "reused": 0, "open_circuits": [], "concurrency_limit": None}
+    try:
+        # 計畫已帶有推斷好的結構，工作行程不需再讀取結構快取；效能退化由主行程統一判斷
+        tester = ApiHealthTester(None, parallel_workers=settings["parallel_workers"],
+                                 config={**config, "schema_validation": False,
+                                         "regression_detection": False})
+        tester.stream_responses = settings["stream_responses"]
+        tester.max_body_bytes = settings["max_body_bytes"]
+        tester.max_retries = settings["max_retries"]
+        if settings.get("budget_seconds") is not None:
+            tester.sweep_deadline = time.monotonic() + settings["budget_seconds"]
+        if settings.get("token_cache_path"):
+            tester.enable_token_cache(settings["token_cache_path"])
+        if not tester.login():
+            result_queue.put(("error", f"工作行程 {os.getpid()} 登入失敗", None))
+            return
+
+        opened_before, sent_before = tester._connection_stats()
+
+        def probe(item):
+            flow_name, plan = item
+            result = tester.test_api(plan)
+            result.response_body = None  # 驗證已在本行程完成，不回傳本體
+            result_queue.put(("result", flow_name, result))
+
+        with ThreadPoolExecutor(max_workers=max(1, settings["parallel_workers"])) as executor:
+            list(executor.map(probe, shard))
+
+        opened_after, sent_after = tester._connection_stats()
+        stats["opened"] = opened_after - opened_before
+        stats["reused"] = max(0, (sent_after - sent_before) - stats["opened"])
+        if tester.circuit_breaker is not None:
+            stats["open_circuits"] = tester.circuit_breaker.open_hosts()
+        if tester.concurrency_limiter is not None:
+            stats["concurrency_limit"] = int(tester.concurrency_limiter.limit)
+    except Exception as e:
+        result_queue.put(("error", f"工作行程 {os.getpid()} 錯誤: {str(e)}", None))
+    finally:
+        result_queue.put(("done", stats, None))
+
+
+def run_fleet(fleet_config: Dict, default_record_path: str, base_dir: Path,
+              overrides: Optional[Dict] = None) -> Dict:
+    """多目標模式：每個目標各自登入，於共用的並行上限下同時執行，回傳合併報告
+
+    fleet_config 的 targets 為目標清單；其餘欄位為各目標共用的預設設定。
+    設定中 record 與快取、基準等相對路徑皆以 base_dir (設定檔目錄) 解析。
+    overrides 為命令列指定的設定，優先於共用與目標內的設定。
+    """
+    shared = {k: v for k, v in fleet_config.items() if k != "targets"}
+    targets = fleet_config.get("targets", [])
+    global_limit = fleet_config.get("global_concurrency", 20)
+    gate = ConcurrencyGate(
+        global_limit,
+        fleet_config.get("per_host_concurrency", 10),
+        fleet_config.get("host_concurrency", {})
+    )
+
+    def run_target(target: Dict) -> tuple:
+        config = {**shared, **target, **(overrides or {})}
+        key = target.get("name") or f"{config.get('tenant', '')}@{config.get('base_url', '')}"
+        # 測試器未綁定設定檔 (config_path=None)，相對路徑需先以 base_dir 解析，避免寫到目前工作目錄
+        for path_key, default in (("schema_cache_path", "schema-cache.json"),
+                                  ("baseline_path", "latency-baseline.json"),
+                                  ("token_cache_path", None)):
+            path_value = config.get(path_key, default)
+            if path_value and not Path(path_value).is_absolute():
+                config[path_key] = str(base_dir / path_value)
+        # 每個目標最多可用滿全域上限，實際並行數由 gate 控制
+        tester = ApiHealthTester(None, parallel_workers=global_limit, config=config)
+        tester.request_gate = gate
+        record_path = base_dir / target["record"] if target.get("record") else default_record_path
+        report = tester.run_tests(str(record_path))
+        return key, config, tester._report_to_dict(report), report
+
+    with ThreadPoolExecutor(max_workers=max(1, len(targets))) as executor:
+        outcomes = list(executor.map(run_target, targets))
+
+    total = sum(report.total_apis for *_, report in outcomes)
+    success = sum(report.success_count for *_, report in outcomes)
+    return {
+        "testDate": datetime.now().isoformat(),
+        "summary": {
+            "totalTargets": len(outcomes),
+            "totalApis": total,
+            "successCount": success,
+            "failureCount": sum(report.failure_count for *_, report in outcomes),
+            "healthScore": f"{(success / total * 100) if total else 0.0:.1f}%"
+        },
+        "targets": {
+            key: {"tenant": config.get("tenant", ""), **report_data}
+            for key, config, report_data, _ in outcomes
+        }
+    }
+
+
 def main():
     """主程式"""
     import argparse
@@ -516,6 +3453,169 @@ def main():
         default=1,
         help="並行執行緒數量 (預設: 1 = 序列執行，建議 5-10)"
     )
+    parser.add_argument(
+        "--engine", "-e",
+        choices=["thread", "async", "process"],
+        default="thread",
+        help="執行引擎 (預設: thread；async 需安裝 aiohttp；process 為多行程分片)"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="process 引擎的工作行程數 (預設: CPU 核心數)，每個行程使用 --parallel 個執行緒"
+    )
+    parser.add_argument(
+        "--stream-responses",
+        action="store_true",
+        help="串流讀取回應，只保留大小與雜湊 (亦可於 config 設定 stream_responses)"
+    )
+    parser.add_argument(
+        "--max-body-bytes",
+        type=int,
+        default=None,
+        help="串流模式每個回應最多讀取的位元組數 (預設: config 的 max_body_bytes 或 10MB)"
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="常駐監控模式：依各 API 的 intervalSeconds 持續探測"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=60.0,
+        help="常駐模式未設定 intervalSeconds 時的探測間隔秒數 (預設: 60)"
+    )
+    parser.add_argument(
+        "--daemon-output",
+        default="daemon-results.ndjson",
+        help="常駐模式逐筆附加結果的 NDJSON 檔路徑 (預設: daemon-results.ndjson)"
+    )
+    parser.add_argument(
+        "--history",
+        default=None,
+        help="歷史結果資料庫路徑 (SQLite，僅附加)，例如 history.db"
+    )
+    parser.add_argument(
+        "--history-export",
+        default=None,
+        help="將每日彙總 (p50/p95/p99、錯誤率) 匯出為 JSON 檔，需搭配 --history"
+    )
+    parser.add_argument(
+        "--load-test",
+        action="store_true",
+        help="負載測試模式：以虛擬使用者重播頁面流程"
+    )
+    parser.add_argument(
+        "--users",
+        type=int,
+        default=10,
+        help="負載測試的虛擬使用者數量 (預設: 10)"
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=60.0,
+        help="負載測試持續秒數 (預設: 60)"
+    )
+    parser.add_argument(
+        "--ramp-up",
+        type=float,
+        default=0.0,
+        help="負載測試爬升到全部虛擬使用者的秒數 (預設: 0)"
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=None,
+        help="負載測試的每秒請求數上限 (預設: 不限制)"
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=1.0,
+        help="負載測試中同一流程兩次呼叫間的平均思考秒數 (預設: 1.0)"
+    )
+    parser.add_argument(
+        "--load-output",
+        default="load-test-result.json",
+        help="負載測試報告路徑 (預設: load-test-result.json)"
+    )
+    parser.add_argument(
+        "--fleet-output",
+        default="fleet-result.json",
+        help="多目標設定 (config 含 targets) 的合併報告路徑 (預設: fleet-result.json)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量模式：略過長期穩定且記錄未變更的端點"
+    )
+    parser.add_argument(
+        "--state-file",
+        default="probe-state.json",
+        help="增量模式的端點狀態檔路徑 (預設: probe-state.json)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=100,
+        help="async 引擎同時進行中的請求上限 (預設: 100)"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        help="失敗 (連線錯誤/超時/429/5xx) 時的重試次數 (預設: 設定檔 retry_max_retries 或 2)"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="整次掃描的時間預算 (秒)，超過後尚未開始的探測直接略過"
+    )
+    parser.add_argument(
+        "--token-cache",
+        nargs="?",
+        const=".token-cache.json",
+        metavar="PATH",
+        help="啟用登入 Token 磁碟快取 (預設路徑: .token-cache.json)，Token 仍有效時不重新登入"
+    )
+    parser.add_argument(
+        "--baseline-import",
+        nargs="+",
+        metavar="REPORT",
+        help="由先前的 test-result.json 匯入各端點的歷史延遲基準 (可指定多個)"
+    )
+    parser.add_argument(
+        "--no-regression-detection",
+        action="store_true",
+        help="停用相對歷史基準的效能退化偵測"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="於本機此連接埠提供 Prometheus /metrics 端點 (常駐模式最適用)"
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        metavar="PATH",
+        help="將指標寫入 node_exporter textfile collector 檔案 (例如 /var/lib/node_exporter/api_health.prom)"
+    )
+    parser.add_argument(
+        "--no-coalesce",
+        action="store_true",
+        help="不合併相同請求，每個頁面流程的 API 各自送出"
+    )
+    parser.add_argument(
+        "--no-full-report",
+        action="store_true",
+        help="不寫出完整報告 (--output)，只保留 .ndjson 詳細結果與 .summary.json 摘要索引"
+    )
+    parser.add_argument(
+        "--convert-record",
+        metavar="JSONL_PATH",
+        help="將 --record 指定的 .json 記錄檔轉為 .jsonl (每行一個 API 呼叫) 後結束"
+    )
 
     args = parser.parse_args()
 
@@ -525,6 +3625,12 @@ def main():
     record_path = script_dir / args.record
     output_path = script_dir / args.output
 
+    if args.convert_record:
+        jsonl_path = script_dir / args.convert_record
+        count = convert_record_to_jsonl(str(record_path), str(jsonl_path))
+        print(f"[轉換] 已寫出 {count} 個 API 呼叫至: {jsonl_path}")
+        return 0
+
     print("=" * 60)
     print("API 健康度檢測腳本 - 第二階段")
     print("=" * 60)
@@ -532,15 +3638,147 @@ def main():
     print(f"API 記錄: {record_path}")
     print(f"輸出報告: {output_path}")
     print(f"並行執行緒: {args.parallel}")
+    print(f"執行引擎: {args.engine}")
+
+    # 設定檔含 targets 時使用多目標模式
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if "targets" in config:
+        # 多目標模式的並行數由 global_concurrency / per_host_concurrency 控制，且只支援 thread 引擎
+        unsupported = [flag for flag, used in (
+            ("--engine", args.engine != parser.get_default("engine")),
+            ("--parallel", args.parallel != parser.get_default("parallel")),
+            ("--processes", args.processes is not None),
+            ("--concurrency", args.concurrency != parser.get_default("concurrency")),
+            ("--incremental", args.incremental),
+            ("--history", bool(args.history)),
+            ("--metrics-port", args.metrics_port is not None),
+            ("--metrics-textfile", bool(args.metrics_textfile)),
+            ("--daemon", args.daemon),
+            ("--load-test", args.load_test),
+            ("--baseline-import", bool(args.baseline_import)),
+            ("--no-full-report", args.no_full_report),
+        ) if used]
+        if unsupported:
+            parser.error(f"多目標設定 (config 含 targets) 不支援 {', '.join(unsupported)}；"
+                         "並行數請改用設定檔的 global_concurrency / per_host_concurrency")
+
+        overrides: Dict[str, Any] = {}
+        if args.token_cache:
+            overrides["token_cache_path"] = str(script_dir / args.token_cache)
+        if args.stream_responses:
+            overrides["stream_responses"] = True
+        if args.max_body_bytes is not None:
+            overrides["max_body_bytes"] = args.max_body_bytes
+        if args.retries is not None:
+            overrides["retry_max_retries"] = args.retries
+        if args.budget is not None:
+            overrides["sweep_budget_seconds"] = args.budget
+        if args.no_coalesce:
+            overrides["coalesce_probes"] = False
+        if args.no_regression_detection:
+            overrides["regression_detection"] = False
+        fleet_report = run_fleet(config, str(record_path), config_path.parent, overrides)
+        fleet_output_path = script_dir / args.fleet_output
+        with open(fleet_output_path, "w", encoding="utf-8") as f:
+            json.dump(fleet_report, f, ensure_ascii=False, indent=2)
+        summary = fleet_report["summary"]
+        print(f"\n[多目標] {summary['totalTargets']} 個目標，共 {summary['totalApis']} 個 API，"
+              f"健康度 {summary['healthScore']}")
+        print(f"[報告] 已儲存至: {fleet_output_path}")
+        return 0 if summary["failureCount"] == 0 else 1
 
     # 執行測試
-    tester = ApiHealthTester(str(config_path), parallel_workers=args.parallel)
+    tester = ApiHealthTester(
+        str(config_path),
+        parallel_workers=args.parallel,
+        engine=args.engine,
+        async_concurrency=args.concurrency,
+        processes=args.processes
+    )
+    if args.stream_responses:
+        tester.stream_responses = True
+    if args.max_body_bytes is not None:
+        tester.max_body_bytes = args.max_body_bytes
+    if args.token_cache:
+        tester.enable_token_cache(str(script_dir / args.token_cache))
+    if args.no_regression_detection:
+        tester.latency_baseline = None
+    elif args.baseline_import and tester.latency_baseline is not None:
+        for report_path in args.baseline_import:
+            count = tester.latency_baseline.import_report(str(script_dir / report_path), tester._baseline_scope())
+            print(f"[基準] 由 {report_path} 匯入 {count} 筆回應時間")
+    elif tester.latency_baseline is not None and not os.path.exists(tester.latency_baseline.baseline_path) \
+            and tester.config.get("baseline_seed_from_git", True):
+        # 沒有基準檔時 (如 CI 的全新 checkout)，改由 git 歷史中先前提交的報告建立
+        count = tester.latency_baseline.seed_from_git(str(output_path), tester._baseline_scope())
+        if count:
+            print(f"[基準] 由 git 歷史中的 {output_path.name} 匯入 {count} 筆回應時間")
+    metrics_port = args.metrics_port if args.metrics_port is not None else tester.config.get("metrics_port")
+    metrics_textfile = args.metrics_textfile or tester.config.get("metrics_textfile")
+    if metrics_port is not None or metrics_textfile:
+        tester.enable_metrics(metrics_port, str(script_dir / metrics_textfile) if metrics_textfile else None)
+    if args.no_coalesce:
+        tester.coalesce_probes = False
+    if args.retries is not None:
+        tester.max_retries = args.retries
+    if args.budget is not None:
+        tester.sweep_budget_seconds = args.budget
+    if args.incremental:
+        tester.enable_incremental(str(script_dir / args.state_file))
+
+    if args.load_test:
+        load_report = tester.run_load_test(
+            str(record_path),
+            users=args.users,
+            duration_seconds=args.duration,
+            ramp_up_seconds=args.ramp_up,
+            target_rps=args.rps,
+            think_time_seconds=args.think_time
+        )
+        load_output_path = script_dir / args.load_output
+        with open(load_output_path, "w", encoding="utf-8") as f:
+            json.dump(load_report, f, ensure_ascii=False, indent=2)
+        summary = load_report["summary"]
+        latency = summary["latencyPercentiles"]
+        print(f"\n[負載] 總請求數: {summary['totalRequests']}，吞吐量: {summary['throughputRps']} rps，"
+              f"錯誤率: {summary['errorRate'] * 100:.1f}%")
+        print(f"[負載] p50 {latency['p50Ms']:.0f}ms / p90 {latency['p90Ms']:.0f}ms / "
+              f"p99 {latency['p99Ms']:.0f}ms / max {latency['maxMs']:.0f}ms")
+        print(f"[負載] 報告已儲存至: {load_output_path}")
+        return 0
+
+    store = ResultStore(str(script_dir / args.history)) if args.history else None
+
+    if args.daemon:
+        tester.run_daemon(str(record_path), str(script_dir / args.daemon_output),
+                          default_interval=args.interval, store=store)
+        if store is not None:
+            store.close()
+        if tester.metrics is not None:
+            tester.metrics.close()
+        return 0
+
+    # 結果邊測試邊寫入 .ndjson，結束後寫出儀表板用的摘要索引
+    tester.enable_result_stream(str(output_path))
+    tester.write_full_report = not args.no_full_report
     report = tester.run_tests(str(record_path))
 
     # 產生報告
     tester.generate_report(report, str(output_path))
     tester.print_summary(report)
 
+    # 保存歷史並匯出彙總
+    if store is not None:
+        store.append_report(report)
+        if args.history_export:
+            with open(script_dir / args.history_export, "w", encoding="utf-8") as f:
+                json.dump(store.query_rollups("day"), f, ensure_ascii=False, indent=2)
+            print(f"[歷史] 每日彙總已匯出至: {script_dir / args.history_export}")
+        store.close()
+    if tester.metrics is not None:
+        tester.metrics.close()
+
     # 回傳結束碼
     return 0 if report.failure_count == 0 else 1
 
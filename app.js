@@ -15,14 +15,22 @@ const elements = {
     statFailure: document.getElementById('stat-failure'),
     statAvgTime: document.getElementById('stat-avgtime'),
     alertsSection: document.getElementById('alerts-section'),
+    latencySection: document.getElementById('latency-section'),
+    latencyChart: document.getElementById('latency-chart'),
+    slowestList: document.getElementById('slowest-list'),
+    regressionsSection: document.getElementById('regressions-section'),
+    regressionsList: document.getElementById('regressions-list'),
+    loadMore: document.getElementById('load-more'),
     resultsBody: document.getElementById('results-body'),
     lastUpdate: document.getElementById('last-update'),
-    filterBtns: document.querySelectorAll('.filter-btn')
+    filterBtns: document.querySelectorAll('.filter-btn[data-filter]')
 };
 
 // 全域狀態
 let testData = null;
 let currentFilter = 'all';
+let resultPages = null;        // 摘要索引的分頁資訊 { file, pages, loaded }
+let resultFileBuffer = null;   // 伺服器不支援 Range 時快取整個 NDJSON
 
 /**
  * 初始化應用程式
@@ -43,6 +51,16 @@ async function init() {
  * 載入測試結果
  */
 async function loadTestResults() {
+    // 優先載入摘要索引，詳細結果再分頁載入；沒有摘要索引時讀取完整報告
+    const summaryResponse = await fetch('test-result.summary.json');
+    if (summaryResponse.ok) {
+        const data = await summaryResponse.json();
+        data.detailedResults = [];
+        resultPages = { file: data.results.file, pages: data.results.pages, loaded: 0 };
+        await loadNextResultPage(data);
+        return data;
+    }
+
     const response = await fetch('test-result.json');
     if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
@@ -50,6 +68,41 @@ async function loadTestResults() {
     return await response.json();
 }
 
+/**
+ * 載入下一頁詳細結果 (NDJSON)
+ */
+async function loadNextResultPage(data) {
+    const page = resultPages.pages[resultPages.loaded];
+    if (!page) return;
+
+    const text = await fetchByteRange(resultPages.file, page.offset, page.bytes);
+    text.split('\n')
+        .filter(line => line.trim())
+        .forEach(line => data.detailedResults.push(JSON.parse(line)));
+    resultPages.loaded += 1;
+}
+
+/**
+ * 以 Range 請求讀取檔案的指定位元組範圍
+ */
+async function fetchByteRange(url, offset, length) {
+    const decoder = new TextDecoder('utf-8');
+    if (!resultFileBuffer) {
+        const response = await fetch(url, {
+            headers: { Range: `bytes=${offset}-${offset + length - 1}` }
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        if (response.status === 206) {
+            return decoder.decode(await response.arrayBuffer());
+        }
+        // 伺服器忽略 Range 時回傳整個檔案，快取後自行切片
+        resultFileBuffer = await response.arrayBuffer();
+    }
+    return decoder.decode(resultFileBuffer.slice(offset, offset + length));
+}
+
 /**
  * 顯示主內容
  */
@@ -75,11 +128,72 @@ function renderDashboard(data) {
     renderEnvironment(data.environment);
     renderHealthScore(data.summary.healthScore);
     renderStats(data.summary);
-    renderAlerts(data.criticalFailures, data.warnings);
+    renderLatency(data.summary);
+    renderSlowest(data.slowest || []);
+    renderRegressions(data.performanceRegressions || []);
+    renderAlerts(data.criticalFailures, data.warnings,
+        (data.criticalFailureCount || 0) + (data.warningCount || 0));
     renderResults(data.detailedResults);
+    renderLoadMore(data);
     renderLastUpdate(data.testDate);
 }
 
+/**
+ * 渲染最慢的端點 (摘要索引預先計算)
+ */
+function renderSlowest(slowest) {
+    if (!slowest.length) {
+        elements.slowestList.innerHTML = '';
+        return;
+    }
+
+    elements.slowestList.innerHTML = `
+      <div class="latency-group__title">最慢的 ${slowest.length} 個端點</div>
+      ${slowest.map(item => `
+      <div class="slowest-item">
+        <span class="method-badge method-badge--${item.method.toLowerCase()}">${item.method}</span>
+        <span class="slowest-item__endpoint">${escapeHtml(item.endpoint.replace(/^(GET|POST|PUT|DELETE)\s+/, ''))}</span>
+        <span class="response-time response-time--${getTimeClass(item.responseTimeMs)}">${item.responseTimeMs.toFixed(0)}ms</span>
+      </div>
+      `).join('')}
+    `;
+    elements.latencySection.style.display = 'block';
+}
+
+/**
+ * 渲染相對歷史基準明顯變慢的端點
+ */
+function renderRegressions(regressions) {
+    if (!regressions.length) {
+        elements.regressionsSection.style.display = 'none';
+        return;
+    }
+
+    elements.regressionsList.innerHTML = regressions.map(item => `
+      <div class="regression-item">
+        <span class="method-badge method-badge--${item.method.toLowerCase()}">${item.method}</span>
+        <span class="regression-item__endpoint" title="${escapeHtml(item.pageFlow || '')}">${escapeHtml(item.endpoint.replace(/^(GET|POST|PUT|DELETE)\s+/, ''))}</span>
+        <span class="response-time response-time--${getTimeClass(item.responseTimeMs)}">${item.responseTimeMs.toFixed(0)}ms</span>
+        <span class="regression-item__baseline">
+          基準 ${item.baselineMedianMs.toFixed(0)}ms · ×${item.ratio} · z ${item.zScore} (${item.samples} 次)
+        </span>
+      </div>
+    `).join('');
+    elements.regressionsSection.style.display = 'block';
+}
+
+/**
+ * 渲染「載入更多」按鈕
+ */
+function renderLoadMore(data) {
+    if (!resultPages || resultPages.loaded >= resultPages.pages.length) {
+        elements.loadMore.style.display = 'none';
+        return;
+    }
+    elements.loadMore.textContent = `載入更多 (${data.detailedResults.length} / ${data.results.count})`;
+    elements.loadMore.style.display = 'block';
+}
+
 /**
  * 渲染環境資訊
  */
@@ -91,6 +205,14 @@ function renderEnvironment(environment) {
  * 渲染健康度圓環
  */
 function renderHealthScore(healthScore) {
+    // 本次沒有實際送出的請求 (如增量模式全部略過) 時健康度未知，不顯示為 0%
+    if (healthScore === null || healthScore === undefined) {
+        elements.scoreRing.classList.remove('warning', 'danger');
+        elements.scoreRing.style.strokeDashoffset = 2 * Math.PI * 90;
+        elements.scorePercentage.textContent = '—';
+        return;
+    }
+
     const score = parseFloat(healthScore);
     const circumference = 2 * Math.PI * 90; // r = 90
     const offset = circumference - (score / 100) * circumference;
@@ -144,10 +266,50 @@ function renderStats(summary) {
     elements.statAvgTime.textContent = `${summary.avgResponseTimeMs.toFixed(0)}ms`;
 }
 
+/**
+ * 渲染回應時間百分位數 (整體與各頁面流程)
+ */
+function renderLatency(summary) {
+    const overall = summary.latencyPercentiles;
+    if (!overall || !overall.count) {
+        elements.latencySection.style.display = 'none';
+        return;
+    }
+
+    const flows = Object.entries(summary.flowLatencyPercentiles || {});
+    const scale = Math.max(overall.maxMs, 1);
+    const percentiles = [
+        { key: 'p50Ms', label: 'p50' },
+        { key: 'p90Ms', label: 'p90' },
+        { key: 'p99Ms', label: 'p99' },
+        { key: 'maxMs', label: 'max' }
+    ];
+
+    const renderGroup = (title, stats) => `
+      <div class="latency-group">
+        <div class="latency-group__title">${escapeHtml(title)} <span class="latency-group__count">${stats.count} 次</span></div>
+        ${percentiles.map(p => `
+        <div class="latency-bar">
+          <span class="latency-bar__label">${p.label}</span>
+          <span class="latency-bar__track">
+            <span class="latency-bar__fill latency-bar__fill--${getTimeClass(stats[p.key])}"
+                  style="width: ${(stats[p.key] / scale) * 100}%"></span>
+          </span>
+          <span class="latency-bar__value">${stats[p.key].toFixed(0)}ms</span>
+        </div>
+        `).join('')}
+      </div>
+    `;
+
+    elements.latencyChart.innerHTML = renderGroup('整體', overall) +
+        flows.map(([name, stats]) => renderGroup(name, stats)).join('');
+    elements.latencySection.style.display = 'block';
+}
+
 /**
  * 渲染警告與錯誤
  */
-function renderAlerts(criticalFailures, warnings) {
+function renderAlerts(criticalFailures, warnings, totalCount = 0) {
     let html = '';
 
     // 嚴重錯誤
@@ -176,6 +338,19 @@ function renderAlerts(criticalFailures, warnings) {
     `;
     });
 
+    // 摘要索引只保留前段訊息，其餘請見詳細結果
+    const hiddenCount = totalCount - criticalFailures.length - warnings.length;
+    if (hiddenCount > 0) {
+        html += `
+      <div class="alert alert--warning">
+        <span class="alert__icon">ℹ️</span>
+        <div class="alert__content">
+          <div class="alert__message">另有 ${hiddenCount} 則訊息未顯示</div>
+        </div>
+      </div>
+    `;
+    }
+
     elements.alertsSection.innerHTML = html;
 }
 
@@ -186,17 +361,20 @@ function renderResults(results) {
     const filteredResults = filterResults(results, currentFilter);
 
     const html = filteredResults.map((result, index) => {
-        const statusClass = result.isSuccess ? 'success' : 'failure';
-        const statusText = result.isSuccess ? '成功' : '失敗';
+        const notProbed = isNotProbed(result);
+        const statusClass = notProbed ? 'skipped' : result.isSuccess ? 'success' : 'failure';
+        const statusText = notProbed ? '未探測' : result.isSuccess ? '成功' : '失敗';
         const methodClass = result.method.toLowerCase();
         const timeClass = getTimeClass(result.responseTimeMs);
         const endpoint = result.endpoint.replace(/^(GET|POST|PUT|DELETE)\s+/, '');
         const strategy = getStrategyInfo(result.testStrategy);
         const hasInput = result.requestParams && Object.keys(result.requestParams).length > 0;
+        const hasTimings = Boolean(result.timings);
+        const expandable = hasInput || hasTimings;
         const rowId = `result-row-${index}`;
 
         return `
-      <tr class="result-row ${hasInput ? 'result-row--expandable' : ''}" data-row-id="${rowId}">
+      <tr class="result-row ${expandable ? 'result-row--expandable' : ''}" data-row-id="${rowId}">
         <td>
           <span class="status-badge status-badge--${statusClass}">
             <span class="status-badge__dot"></span>
@@ -207,7 +385,7 @@ function renderResults(results) {
           <span class="method-badge method-badge--${methodClass}">${result.method}</span>
         </td>
         <td class="endpoint">
-          ${hasInput ? '<span class="expand-icon">▶</span>' : ''}
+          ${expandable ? '<span class="expand-icon">▶</span>' : ''}
           ${escapeHtml(endpoint)}
         </td>
         <td>
@@ -217,17 +395,21 @@ function renderResults(results) {
         </td>
         <td>
           <span class="response-time response-time--${timeClass}">
-            ${result.responseTimeMs.toFixed(0)}ms
+            ${notProbed ? '—' : `${result.responseTimeMs.toFixed(0)}ms`}
           </span>
+          ${renderResilienceNote(result)}
         </td>
       </tr>
-      ${hasInput ? `
+      ${expandable ? `
       <tr class="result-detail" id="${rowId}" style="display: none;">
         <td colspan="5">
+          ${hasTimings ? renderTimings(result.timings) : ''}
+          ${hasInput ? `
           <div class="input-params">
             <div class="input-params__header">📥 Request Input</div>
             <pre class="input-params__content">${formatJson(result.requestParams)}</pre>
           </div>
+          ` : ''}
         </td>
       </tr>
       ` : ''}
@@ -238,6 +420,65 @@ function renderResults(results) {
     setupAccordionListeners();
 }
 
+/**
+ * 因主機斷路或逾時間預算而未實際送出請求
+ */
+function isNotProbed(result) {
+    return Boolean(result.shortCircuited || result.budgetExhausted);
+}
+
+/**
+ * 渲染重試 / 斷路 / 逾時間預算標記
+ */
+function renderResilienceNote(result) {
+    if (result.shortCircuited) {
+        return '<span class="resilience-note" title="主機斷路中，未送出請求">斷路</span>';
+    }
+    if (result.budgetExhausted) {
+        return '<span class="resilience-note" title="已超過掃描時間預算，未執行">逾預算</span>';
+    }
+    if (result.attempts > 1) {
+        return `<span class="resilience-note" title="共嘗試 ${result.attempts} 次">重試 ×${result.attempts - 1}</span>`;
+    }
+    return '';
+}
+
+/**
+ * 渲染回應時間分段 (DNS / 連線 / TLS / 等待回應 / 下載)
+ */
+function renderTimings(timings) {
+    const phases = [
+        { key: 'dnsMs', label: 'DNS', class: 'dns' },
+        { key: 'connectMs', label: '連線', class: 'connect' },
+        { key: 'tlsMs', label: 'TLS', class: 'tls' },
+        { key: 'ttfbMs', label: '等待回應', class: 'ttfb' },
+        { key: 'bodyMs', label: '下載', class: 'body' }
+    ];
+    const total = phases.reduce((sum, phase) => sum + (timings[phase.key] || 0), 0) || 1;
+
+    const bar = phases.map(phase => {
+        const width = ((timings[phase.key] || 0) / total) * 100;
+        return width > 0
+            ? `<span class="timing-bar__segment timing-bar__segment--${phase.class}" style="width: ${width}%"></span>`
+            : '';
+    }).join('');
+
+    const legend = phases.map(phase => `
+            <span class="timing-legend__item">
+              <span class="timing-legend__dot timing-bar__segment--${phase.class}"></span>
+              ${phase.label} ${(timings[phase.key] || 0).toFixed(0)}ms
+            </span>
+    `).join('');
+
+    return `
+          <div class="input-params">
+            <div class="input-params__header">⏱️ 回應時間分段</div>
+            <div class="timing-bar">${bar}</div>
+            <div class="timing-legend">${legend}</div>
+          </div>
+    `;
+}
+
 /**
  * 取得測試策略資訊
  */
@@ -270,7 +511,7 @@ function filterResults(results, filter) {
         case 'success':
             return results.filter(r => r.isSuccess);
         case 'failure':
-            return results.filter(r => !r.isSuccess);
+            return results.filter(r => !r.isSuccess && !isNotProbed(r));
         default:
             return results;
     }
@@ -316,6 +557,19 @@ function setupEventListeners() {
             renderResults(testData.detailedResults);
         });
     });
+
+    elements.loadMore.addEventListener('click', async () => {
+        elements.loadMore.disabled = true;
+        try {
+            await loadNextResultPage(testData);
+            renderResults(testData.detailedResults);
+            renderLoadMore(testData);
+        } catch (error) {
+            console.error('載入詳細結果失敗:', error);
+        } finally {
+            elements.loadMore.disabled = false;
+        }
+    });
 }
 
 /**
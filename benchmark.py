@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+API 健康度檢測腳本 - 效能基準測試
+啟動本機模擬 ABP 後端，以 ApiHealthTester 探測 100 / 1k / 10k 個端點，
+量測每秒探測數、每次探測的 CPU 時間、記憶體峰值與回應時間的量測誤差
+"""
+
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows 無 resource 模組，僅能量測本行程 CPU 時間
+    resource = None
+
+from api_health_test import ApiHealthTester, EMP_CODE_PLACEHOLDER
+
+BENCH_PREFIX = "/api/bench/Endpoint"
+BENCH_TOKEN = "bench-token"
+BENCH_EMP_CODE = "E0001"
+FLOW_SIZE = 20  # 每個模擬頁面流程的 API 數
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """解析延遲分佈設定，回傳以亂數產生器取樣 (毫秒) 的函式
+
+    - fixed:5          固定 5ms
+    - uniform:1-20     1 ~ 20ms 均勻分佈
+    - lognormal:5,0.5  中位數 5ms、sigma 0.5 的對數常態分佈
+    """
+    kind, _, args = spec.partition(":")
+    if kind == "fixed":
+        value = float(args or 0)
+        return lambda rng: value
+    if kind == "uniform":
+        low, _, high = args.partition("-")
+        return lambda rng: rng.uniform(float(low), float(high))
+    if kind == "lognormal":
+        median, _, sigma = args.partition(",")
+        mu = math.log(float(median))
+        return lambda rng: rng.lognormvariate(mu, float(sigma or 0.5))
+    raise ValueError(f"不支援的延遲分佈: {spec}")
+
+
+def endpoint_delay_ms(sample: Callable[[random.Random], float], seed: int, index: int) -> float:
+    """第 index 個端點的注入延遲 (依種子固定，伺服器與量測端計算結果相同)"""
+    return sample(random.Random(f"{seed}:{index}"))
+
+
+def _response_body(index: int, body_bytes: int) -> Dict:
+    """模擬端點的回應內容 (約 body_bytes 大小)"""
+    item_count = max(1, body_bytes // 64)
+    return {
+        "totalCount": item_count,
+        "success": True,
+        "items": [{"id": index * 1000 + i, "name": f"item-{i:04d}"} for i in range(item_count)]
+    }
+
+
+def _serve_mock_backend(settings: Dict, port_queue, stop_event):
+    """模擬 ABP 後端 (於獨立行程執行，CPU 不計入測試器)"""
+    sample = parse_latency(settings["latency"])
+    seed = settings["seed"]
+    error_rate = settings["error_rate"]
+    error_rng = random.Random(seed)
+    error_lock = threading.Lock()
+    bodies: Dict[int, bytes] = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # 支援 keep-alive，與正式環境的連線重用行為一致
+        disable_nagle_algorithm = True  # 標頭與本體分開寫出，避免 Nagle + 延遲 ACK 造成約 40ms 的人為延遲
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            path = self.path.split("?", 1)[0]
+
+            if path.endswith("/api/app/users/Login"):
+                self._send_json(200, json.dumps({"accessToken": BENCH_TOKEN, "expireInSeconds": 3600}).encode())
+                return
+            if path.endswith("/api/app/share/GetUserInfo"):
+                self._send_json(200, json.dumps({"orgEmpCode": BENCH_EMP_CODE}).encode())
+                return
+            if not path.startswith(BENCH_PREFIX):
+                self._send_json(404, b'{"error": "not found"}')
+                return
+            if self.headers.get("Authorization") != f"Bearer {BENCH_TOKEN}":
+                self._send_json(401, b'{"error": "unauthorized"}')
+                return
+
+            index = int(path[len(BENCH_PREFIX):])
+            time.sleep(endpoint_delay_ms(sample, seed, index) / 1000)
+            with error_lock:
+                failed = error_rate > 0 and error_rng.random() < error_rate
+            if failed:
+                self._send_json(503, b'{"error": "injected failure"}')
+                return
+            payload = bodies.get(index)
+            if payload is None:
+                payload = bodies[index] = json.dumps(_response_body(index, settings["body_bytes"])).encode()
+            self._send_json(200, payload)
+
+        do_GET = _handle
+        do_POST = _handle
+        do_PUT = _handle
+        do_DELETE = _handle
+        do_HEAD = _handle
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 512
+
+    server = Server(("127.0.0.1", 0), Handler)
+    port_queue.put(server.server_address[1])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stop_event.wait()
+    server.shutdown()
+
+
+def build_record(base_url: str, endpoint_count: int, body_bytes: int) -> Dict:
+    """產生 endpoint_count 個端點的模擬記錄檔 (格式與第一階段錄製結果相同)"""
+    flows = []
+    for start in range(0, endpoint_count, FLOW_SIZE):
+        calls = []
+        for index in range(start, min(start + FLOW_SIZE, endpoint_count)):
+            method = "GET" if index % 2 == 0 else "POST"
+            calls.append({
+                "endpoint": f"{method} {BENCH_PREFIX}{index}",
+                "fullUrl": f"{base_url}{BENCH_PREFIX}{index}",
+                "method": method,
+                "requestParams": {"pageIndex": 1, "pageSize": 20, "empCode": EMP_CODE_PLACEHOLDER},
+                "expectedStatus": 200,
+                "actualStatus": 200,
+                "actualResponse": _response_body(index, body_bytes)
+            })
+        flows.append({"pageFlow": f"BenchFlow{start // FLOW_SIZE}", "apiCalls": calls})
+    return {"testInfo": {"environment": base_url}, "pageFlows": flows}
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def _cpu_seconds() -> float:
+    """本行程與已結束子行程 (process 引擎) 的 CPU 時間"""
+    if resource is None:
+        return time.process_time()
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """本行程與子行程的記憶體峰值 (MB)"""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux 以 KB 為單位，macOS 以 bytes 為單位
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_scenario(base_url: str, settings: Dict, endpoint_count: int, result_queue):
+    """在獨立行程執行單一情境，讓記憶體峰值與 CPU 時間不受其他情境影響"""
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            config_path = Path(work_dir) / "config.json"
+            record_path = Path(work_dir) / "record.json"
+            config = {
+                "base_url": base_url,
+                "tenant": "Bench",
+                "account": "bench",
+                "password": "bench",
+                "sla_threshold_ms": 10000,
+                "schema_cache_path": str(Path(work_dir) / "schema-cache.json"),
+                **settings["tester_config"]
+            }
+            config_path.write_text(json.dumps(config), encoding="utf-8")
+            record_path.write_text(json.dumps(build_record(base_url, endpoint_count, settings["body_bytes"])),
+                                   encoding="utf-8")
+
+            tester = ApiHealthTester(str(config_path), parallel_workers=settings["parallel"],
+                                     engine=settings["engine"], async_concurrency=settings["concurrency"],
+                                     processes=settings["processes"])
+
+            # 測試器的逐筆輸出會拖慢量測，基準測試期間丟棄
+            cpu_before = _cpu_seconds()
+            wall_start = time.perf_counter()
+            with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                report = tester.run_tests(str(record_path))
+            wall_seconds = time.perf_counter() - wall_start
+            cpu_seconds = _cpu_seconds() - cpu_before
+
+        # 量測誤差 = 測試器量得的回應時間 - 伺服器注入的延遲 (只計成功的探測)
+        sample = parse_latency(settings["latency"])
+        errors = []
+        for result in report.results:
+            if result.actual_status == 200:
+                index = int(result.endpoint.rsplit("Endpoint", 1)[1])
+                errors.append(result.response_time_ms - endpoint_delay_ms(sample, settings["seed"], index))
+
+        probes = max(1, report.total_apis)
+        result_queue.put({
+            "endpoints": endpoint_count,
+            "engine": settings["engine"],
+            "parallel": settings["parallel"],
+            "probes": report.total_apis,
+            "successCount": report.success_count,
+            "failureCount": report.failure_count,
+            "retriedProbes": report.retried_count,
+            "wallSeconds": round(wall_seconds, 3),
+            "probesPerSec": round(report.total_apis / wall_seconds, 1) if wall_seconds else 0.0,
+            "cpuMsPerProbe": round(cpu_seconds * 1000 / probes, 3),
+            "peakRssMb": _peak_rss_mb(),
+            "latencyErrorMs": {
+                "mean": round(sum(errors) / len(errors), 3) if errors else 0.0,
+                "p50": round(_percentile(errors, 50), 3),
+                "p99": round(_percentile(errors, 99), 3),
+                "max": round(max(errors), 3) if errors else 0.0
+            }
+        })
+    except Exception as e:
+        result_queue.put({"endpoints": endpoint_count, "error": str(e)})
+
+
+def run_benchmark(sizes: List[int], settings: Dict) -> List[Dict]:
+    """啟動模擬後端並依序執行各端點數量的情境"""
+    context = multiprocessing.get_context()
+    port_queue = context.Queue()
+    stop_event = context.Event()
+    server = context.Process(target=_serve_mock_backend, args=(settings, port_queue, stop_event), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+    print(f"[模擬後端] {base_url} (延遲 {settings['latency']}，錯誤率 {settings['error_rate']:.1%})")
+
+    results = []
+    try:
+        for endpoint_count in sizes:
+            print(f"[基準] {endpoint_count} 個端點，引擎 {settings['engine']}，並行 {settings['parallel']}...")
+            result_queue = context.Queue()
+            worker = context.Process(target=_run_scenario, args=(base_url, settings, endpoint_count, result_queue))
+            worker.start()
+            result = result_queue.get()
+            worker.join()
+            results.append(result)
+            _print_scenario(result)
+    finally:
+        stop_event.set()
+        server.join(timeout=5)
+    return results
+
+
+def _print_scenario(result: Dict):
+    if "error" in result:
+        print(f"  [ERROR] {result['error']}")
+        return
+    error = result["latencyErrorMs"]
+    rss = f"{result['peakRssMb']}MB" if result["peakRssMb"] is not None else "N/A"
+    print(f"  探測數 {result['probes']} (失敗 {result['failureCount']})，"
+          f"{result['probesPerSec']} probes/s，CPU {result['cpuMsPerProbe']}ms/probe，記憶體峰值 {rss}")
+    print(f"  量測誤差: 平均 {error['mean']}ms / p50 {error['p50']}ms / p99 {error['p99']}ms / max {error['max']}ms")
+
+
+def compare_with_baseline(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """與先前的基準結果比較，回傳超出容許範圍的退步項目"""
+    previous = {(r["endpoints"], r.get("engine"), r.get("parallel")): r for r in baseline if "error" not in r}
+    regressions = []
+    for result in results:
+        old = previous.get((result["endpoints"], result.get("engine"), result.get("parallel")))
+        if old is None or "error" in result:
+            continue
+        label = f"{result['endpoints']} 個端點"
+        if result["probesPerSec"] < old["probesPerSec"] * (1 - tolerance):
+            regressions.append(f"{label}: 吞吐量 {old['probesPerSec']} -> {result['probesPerSec']} probes/s")
+        if result["cpuMsPerProbe"] > old["cpuMsPerProbe"] * (1 + tolerance):
+            regressions.append(f"{label}: CPU {old['cpuMsPerProbe']} -> {result['cpuMsPerProbe']} ms/probe")
+        if old.get("peakRssMb") and result.get("peakRssMb") and result["peakRssMb"] > old["peakRssMb"] * (1 + tolerance):
+            regressions.append(f"{label}: 記憶體峰值 {old['peakRssMb']} -> {result['peakRssMb']} MB")
+    return regressions
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="API 健康度檢測腳本效能基準測試 (本機模擬後端)")
+    parser.add_argument("--sizes", default="100,1000,10000", help="端點數量，以逗號分隔 (預設: 100,1000,10000)")
+    parser.add_argument("--engine", "-e", choices=["thread", "async", "process"], default="thread",
+                        help="執行引擎 (預設: thread)")
+    parser.add_argument("--parallel", "-p", type=int, default=16, help="並行執行緒數量 (預設: 16)")
+    parser.add_argument("--concurrency", type=int, default=100, help="async 引擎並行上限 (預設: 100)")
+    parser.add_argument("--processes", type=int, help="process 引擎的工作行程數 (預設 CPU 核心數)")
+    parser.add_argument("--latency", default="fixed:5",
+                        help="注入延遲分佈：fixed:MS、uniform:LOW-HIGH 或 lognormal:MEDIAN,SIGMA (預設: fixed:5)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="回傳 503 的機率 (預設: 0)")
+    parser.add_argument("--body-bytes", type=int, default=1024, help="每個回應的大約大小 (預設: 1024)")
+    parser.add_argument("--seed", type=int, default=1, help="延遲與錯誤的亂數種子 (預設: 1)")
+    parser.add_argument("--stream-responses", action="store_true", help="測試器使用串流回應模式")
+    parser.add_argument("--output", "-o", default="benchmark-result.json", help="結果輸出路徑")
+    parser.add_argument("--baseline", help="先前的基準結果，用於比較是否退步")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="退步容許比例 (預設: 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    parse_latency(args.latency)  # 提早檢查設定格式
+    settings = {
+        "engine": args.engine,
+        "parallel": args.parallel,
+        "concurrency": args.concurrency,
+        "processes": args.processes,
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "body_bytes": args.body_bytes,
+        "seed": args.seed,
+        # 模擬後端在本機，不需預熱與增量；結構驗證保持開啟以反映實際成本
+        "tester_config": {"stream_responses": args.stream_responses, "pool_warmup": False}
+    }
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    results = run_benchmark(sizes, settings)
+    output = {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "settings": settings, "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n[報告] 已儲存至: {args.output}")
+
+    if any("error" in result for result in results):
+        return 1
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", [])
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"[回歸] {regression}")
+        if regressions:
+            return 1
+        print("[基準] 與先前結果相比無明顯退步")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,39 @@
+"""相同請求合併後報告統計的單元測試"""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_health_test import ApiHealthTester, ApiTestResult, HealthReport, ProbeTimings  # noqa: E402
+
+
+class FanOutTest(unittest.TestCase):
+
+    def test_average_counts_each_real_request_once(self):
+        tester = ApiHealthTester(None, config={"base_url": "http://h", "schema_validation": False,
+                                               "regression_detection": False})
+        latencies = {"GET /api/shared": 100.0, "GET /api/other": 300.0}
+
+        def probe_once(plan, request_params, safe_params, timeout):
+            return ApiTestResult(
+                endpoint=plan.endpoint, method=plan.method, expected_status=200, actual_status=200,
+                response_time_ms=latencies[plan.endpoint], is_success=True, timings=ProbeTimings(),
+                fingerprint=plan.fingerprint
+            )
+
+        tester._probe_once = probe_once
+        apis = [("flow-a", {"endpoint": endpoint, "fullUrl": f"http://h{endpoint[4:]}", "method": "GET"})
+                for endpoint in latencies]
+        report = tester._run_tests_sequential(apis, HealthReport(test_date="2026-01-01T00:00:00", environment=""))
+        shared_key = tester._coalesce_key(report.results[0])
+
+        tester._fan_out_results(report, {shared_key: ["flow-b", "flow-c"]})
+
+        self.assertEqual(report.total_apis, 4)
+        self.assertEqual(report.success_count, 4)
+        self.assertAlmostEqual(report.avg_response_time_ms, 200.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
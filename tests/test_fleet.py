@@ -0,0 +1,43 @@
+"""多目標模式設定路徑解析的單元測試"""
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import api_health_test  # noqa: E402
+from api_health_test import ApiHealthTester, HealthReport, run_fleet  # noqa: E402
+
+
+class FleetPathTest(unittest.TestCase):
+
+    def test_relative_cache_and_baseline_paths_resolve_against_base_dir(self):
+        testers = []
+
+        class RecordingTester(ApiHealthTester):
+            def run_tests(self, record_path):
+                testers.append(self)
+                return HealthReport(test_date="2026-01-01T00:00:00", environment="")
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(api_health_test, "ApiHealthTester", RecordingTester):
+            base_dir = Path(tmp)
+            run_fleet({
+                "token_cache_path": "tokens.json",
+                "targets": [{"name": "a", "base_url": "http://h"},
+                            {"name": "b", "base_url": "http://h", "baseline_path": "b/baseline.json"}]
+            }, os.path.join(tmp, "record.json"), base_dir)
+
+            self.assertEqual(len(testers), 2)
+            by_name = {tester.config["name"]: tester for tester in testers}
+            self.assertEqual(by_name["a"].schema_cache.cache_path, str(base_dir / "schema-cache.json"))
+            self.assertEqual(by_name["a"].latency_baseline.baseline_path, str(base_dir / "latency-baseline.json"))
+            self.assertEqual(by_name["a"].token_cache.cache_path, str(base_dir / "tokens.json"))
+            self.assertEqual(by_name["b"].latency_baseline.baseline_path, str(base_dir / "b/baseline.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
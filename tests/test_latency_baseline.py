@@ -0,0 +1,85 @@
+"""延遲基準由 git 歷史建立的單元測試"""
+import json
+import multiprocessing
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_health_test import LatencyBaseline  # noqa: E402
+
+
+def git(directory: str, *args: str):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=directory, check=True, capture_output=True)
+
+
+def save_samples(baseline_path: str, worker: int, errors):
+    baseline = LatencyBaseline(baseline_path)
+    for i in range(30):
+        try:
+            baseline.add(f"worker-{worker}", "GET /api/e0", 100.0 + i)
+            baseline.save()
+        except Exception as e:
+            errors.put(repr(e))
+
+
+def report(latency_ms: float) -> dict:
+    return {"detailedResults": [{
+        "endpoint": "GET /api/e0", "isSuccess": True, "actualStatus": 200, "expectedStatus": 200,
+        "requestParams": {}, "responseTimeMs": latency_ms
+    }]}
+
+
+class LatencyBaselineSeedTest(unittest.TestCase):
+
+    def test_seed_from_committed_reports(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            git(tmp, "init", "-q")
+            report_path = os.path.join(tmp, "test-result.json")
+            for latency_ms in (100, 110, 120):
+                with open(report_path, "w", encoding="utf-8") as f:
+                    json.dump(report(latency_ms), f)
+                git(tmp, "add", "test-result.json")
+                git(tmp, "commit", "-q", "-m", f"report {latency_ms}")
+
+            baseline = LatencyBaseline(os.path.join(tmp, "latency-baseline.json"), window=2)
+            count = baseline.seed_from_git(report_path, "scope", max_reports=3)
+
+            self.assertEqual(count, 3)
+            key = LatencyBaseline.key_for("scope", "GET /api/e0", {})
+            self.assertEqual(baseline._endpoints[key]["samples"], [110, 120])
+
+    def test_seed_outside_git_repository(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = LatencyBaseline(os.path.join(tmp, "latency-baseline.json"))
+            self.assertEqual(baseline.seed_from_git(os.path.join(tmp, "test-result.json"), "scope"), 0)
+
+
+class LatencyBaselineSaveTest(unittest.TestCase):
+
+    def test_concurrent_processes_save_without_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline_path = os.path.join(tmp, "latency-baseline.json")
+            errors = multiprocessing.Queue()
+            workers = [multiprocessing.Process(target=save_samples, args=(baseline_path, i, errors))
+                       for i in range(4)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+            self.assertTrue(errors.empty())
+            with open(baseline_path, encoding="utf-8") as f:
+                self.assertIn("endpoints", json.load(f))
+            self.assertEqual(stat.S_IMODE(os.stat(baseline_path).st_mode), 0o644)
+            self.assertEqual([name for name in os.listdir(tmp) if name.endswith(".tmp")], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""增量模式端點狀態的單元測試"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_health_test import ApiHealthTester, ApiTestResult, HealthReport, ProbePlan, ProbeStateStore  # noqa: E402
+
+
+def make_plans(count: int) -> list:
+    return [ProbePlan({"endpoint": f"GET /api/e{i}", "fullUrl": f"http://h/api/e{i}", "method": "GET"},
+                      entry_hash="hash") for i in range(count)]
+
+
+def success(plan: ProbePlan) -> ApiTestResult:
+    return ApiTestResult(endpoint=plan.endpoint, method="GET", expected_status=200, actual_status=200,
+                         response_time_ms=50.0, is_success=True, fingerprint=plan.fingerprint)
+
+
+class ProbeStateStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmp.name, "probe-state.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_once(self, plans: list) -> int:
+        """以新的 ProbeStateStore 模擬一次增量執行，回傳探測數"""
+        store = ProbeStateStore(self.state_path)
+        probed = 0
+        for plan in plans:
+            if store.should_probe(plan, sla_threshold_ms=10000):
+                store.update(plan, success(plan))
+                probed += 1
+            else:
+                store.mark_skipped(plan)
+        store.save()
+        return probed
+
+    def test_endpoints_stabilising_together_are_sampled_in_different_runs(self):
+        plans = make_plans(60)
+        probed_per_run = [self.run_once(plans) for _ in range(40)]
+
+        self.assertEqual(probed_per_run[:3], [60, 60, 60])  # 尚未穩定時每次都探測
+        self.assertTrue(all(count > 0 for count in probed_per_run), probed_per_run)
+        self.assertLess(min(probed_per_run), 60)
+
+    def test_stable_endpoint_is_not_skipped_longer_than_limit(self):
+        plan = make_plans(1)
+        skipped_in_a_row = longest = 0
+        for _ in range(80):
+            if self.run_once(plan):
+                skipped_in_a_row = 0
+            else:
+                skipped_in_a_row += 1
+                longest = max(longest, skipped_in_a_row)
+
+        self.assertGreater(longest, 0)
+        self.assertLessEqual(longest, 10)
+
+    def test_legacy_state_file_is_loaded(self):
+        plan = make_plans(1)[0]
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump({plan.fingerprint: {"entryHash": "other"}}, f)
+
+        store = ProbeStateStore(self.state_path)
+
+        self.assertTrue(store.should_probe(plan, sla_threshold_ms=10000))
+        self.assertEqual(store.runs, 0)
+
+
+class UnknownHealthTest(unittest.TestCase):
+
+    def test_health_is_unknown_when_nothing_was_probed(self):
+        tester = ApiHealthTester(None, config={"base_url": "http://h", "schema_validation": False,
+                                               "regression_detection": False})
+        report = HealthReport(test_date="2026-01-01T00:00:00", environment="", incremental_skipped=60)
+
+        report = tester._finalize_report(report, 0.0)
+
+        self.assertIsNone(report.health_score)
+        self.assertIsNone(tester._report_to_dict(report)["summary"]["healthScore"])
+
+
+if __name__ == "__main__":
+    unittest.main()
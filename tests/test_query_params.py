@@ -0,0 +1,27 @@
+"""async 引擎查詢參數編碼的單元測試"""
+import sys
+import unittest
+from pathlib import Path
+from urllib.parse import urlencode
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_health_test import ApiHealthTester  # noqa: E402
+
+
+class QueryPairsTest(unittest.TestCase):
+
+    def test_matches_requests_encoding(self):
+        params = {"skip": None, "ids": [1, 2, None], "flag": True, "ratio": 1.5, "name": "a b", "tags": ("x",)}
+        expected = requests.Request("GET", "http://h/api", params=params).prepare().url
+
+        self.assertEqual(f"http://h/api?{urlencode(ApiHealthTester._query_pairs(params))}", expected)
+        self.assertEqual(ApiHealthTester._query_pairs(params),
+                         [("ids", "1"), ("ids", "2"), ("flag", "True"), ("ratio", "1.5"), ("name", "a b"),
+                          ("tags", "x")])
+
+
+if __name__ == "__main__":
+    unittest.main()
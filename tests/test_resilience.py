@@ -0,0 +1,133 @@
+"""斷路器與未探測結果的單元測試"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_health_test import ApiHealthTester, ApiTestResult, HealthReport, ProbeTimings  # noqa: E402
+
+
+def make_tester(**config) -> ApiHealthTester:
+    return ApiHealthTester(None, config={
+        "base_url": "http://h",
+        "schema_validation": False,
+        "regression_detection": False,
+        "retry_backoff_ms": 0,
+        **config,
+    })
+
+
+def stub_probe(tester: ApiHealthTester, statuses: dict, calls: list):
+    """以端點對應的狀態碼取代實際請求"""
+
+    def probe_once(plan, request_params, safe_params, timeout):
+        calls.append(plan.endpoint)
+        status = statuses.get(plan.endpoint, 200)
+        return ApiTestResult(
+            endpoint=plan.endpoint, method=plan.method, expected_status=plan.expected_status,
+            actual_status=status, response_time_ms=50.0, is_success=status == plan.expected_status,
+            timings=ProbeTimings(), fingerprint=plan.fingerprint
+        )
+
+    tester._probe_once = probe_once
+
+
+def api(index: int) -> dict:
+    return {"endpoint": f"GET /api/e{index}", "fullUrl": f"http://h/api/e{index}", "method": "GET",
+            "expectedStatus": 200}
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def test_application_errors_do_not_open_circuit(self):
+        tester = make_tester(circuit_breaker_threshold=2)
+        calls = []
+        stub_probe(tester, {"GET /api/e0": 500, "GET /api/e1": 500}, calls)
+
+        results = [tester.test_api(api(i)) for i in range(10)]
+
+        self.assertFalse(any(r.short_circuited for r in results))
+        self.assertTrue(all(r.is_success for r in results[2:]))
+        self.assertEqual(tester.circuit_breaker.open_hosts(), [])
+
+    def test_retries_of_one_endpoint_count_once(self):
+        tester = make_tester(circuit_breaker_threshold=2, retry_max_retries=3)
+        calls = []
+        stub_probe(tester, {"GET /api/e0": 503}, calls)
+
+        first = tester.test_api(api(0))
+        second = tester.test_api(api(0))
+
+        self.assertEqual(first.attempts, 4)
+        self.assertFalse(second.short_circuited)
+        self.assertEqual(tester.circuit_breaker.open_hosts(), [])
+
+    def test_host_failures_across_endpoints_open_circuit(self):
+        tester = make_tester(circuit_breaker_threshold=2, retry_max_retries=0)
+        calls = []
+        stub_probe(tester, {f"GET /api/e{i}": 503 for i in range(10)}, calls)
+
+        results = [tester.test_api(api(i)) for i in range(5)]
+
+        self.assertEqual(calls, ["GET /api/e0", "GET /api/e1"])
+        self.assertTrue(all(r.short_circuited for r in results[2:]))
+        self.assertEqual(tester.circuit_breaker.open_hosts(), ["h"])
+
+
+class NotProbedReportTest(unittest.TestCase):
+
+    def test_short_circuited_results_are_not_failures(self):
+        tester = make_tester(circuit_breaker_threshold=2, retry_max_retries=0)
+        stub_probe(tester, {"GET /api/e0": 503, "GET /api/e1": 503}, [])
+        report = HealthReport(test_date="2026-01-01T00:00:00", environment="")
+
+        report = tester._run_tests_sequential([("flow", api(i)) for i in range(4)], report)
+
+        self.assertEqual(report.not_probed_count, 2)
+        self.assertEqual(report.failure_count, 2)
+        self.assertFalse(any("斷路" in failure for failure in report.critical_failures))
+        self.assertEqual(report.health_score, 0.0)
+        self.assertEqual(report.latency_histogram.total, 2)
+        self.assertAlmostEqual(report.avg_response_time_ms, 50.0)
+
+
+
+class LoadTestErrorRateTest(unittest.TestCase):
+
+    def test_injected_server_errors_are_not_retried_away(self):
+        tester = make_tester(circuit_breaker_threshold=2, retry_max_retries=3)
+        tester.login = lambda use_cache=True: True
+        calls = []
+        lock = threading.Lock()
+
+        def probe_once(plan, request_params, safe_params, timeout):
+            with lock:
+                calls.append(plan.endpoint)
+                status = 503 if len(calls) % 10 < 3 else 200  # 30% 的請求回傳 503
+            return ApiTestResult(
+                endpoint=plan.endpoint, method=plan.method, expected_status=200, actual_status=status,
+                response_time_ms=5.0, is_success=status == 200, timings=ProbeTimings(),
+                fingerprint=plan.fingerprint
+            )
+
+        tester._probe_once = probe_once
+        with tempfile.TemporaryDirectory() as tmp:
+            record_path = os.path.join(tmp, "record.json")
+            with open(record_path, "w", encoding="utf-8") as f:
+                json.dump({"pageFlows": [{"pageFlow": "flow", "apiCalls": [api(i) for i in range(10)]}]}, f)
+            load_report = tester.run_load_test(record_path, users=2, duration_seconds=0.3, think_time_seconds=0)
+
+        summary = load_report["summary"]
+        errors = sum(1 for i in range(1, len(calls) + 1) if i % 10 < 3)
+        self.assertEqual(summary["totalRequests"], len(calls))
+        self.assertAlmostEqual(summary["errorRate"], round(errors / len(calls), 4))
+        self.assertGreater(summary["errorRate"], 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
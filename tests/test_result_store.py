@@ -0,0 +1,39 @@
+"""歷史結果資料庫的單元測試"""
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_health_test import ApiTestResult, ResultStore  # noqa: E402
+
+
+class ResultStoreTest(unittest.TestCase):
+
+    def test_rollup_buckets_are_utc(self):
+        original_tz = os.environ.get("TZ")
+        os.environ["TZ"] = "Asia/Taipei"
+        time.tzset()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                store = ResultStore(os.path.join(tmp, "history.db"))
+                result = ApiTestResult(endpoint="GET /api/e0", method="GET", expected_status=200,
+                                       actual_status=200, response_time_ms=120.0, is_success=True)
+                store.append(result, timestamp=1767225600 + 3600)  # 2026-01-01T01:00:00Z
+                rollups = store.query_rollups("day")
+                store.close()
+        finally:
+            if original_tz is None:
+                os.environ.pop("TZ", None)
+            else:
+                os.environ["TZ"] = original_tz
+            time.tzset()
+
+        self.assertEqual(rollups[0]["bucketStart"], "2026-01-01T00:00:00+00:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
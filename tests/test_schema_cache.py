@@ -0,0 +1,76 @@
+"""結構快取共用同一檔案時的單元測試"""
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_health_test import SchemaCache  # noqa: E402
+
+
+def api(index: int) -> dict:
+    return {"endpoint": f"GET /api/e{index}", "testStrategy": "full_call",
+            "actualResponse": {"result": {"id": index}}}
+
+
+class SchemaCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "schema-cache.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_concurrent_savers_merge_entries(self):
+        caches = [SchemaCache(self.path) for _ in range(4)]
+        for index, cache in enumerate(caches):
+            cache.schema_for(api(index))
+        errors = []
+
+        def save(cache):
+            try:
+                for _ in range(20):
+                    cache._dirty.update(cache._entries)
+                    cache.save()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=save, args=(cache,)) for cache in caches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)["entries"]), 4)
+        self.assertEqual(list(Path(self.tmp.name).glob("*.tmp")), [])
+
+    def test_stale_entries_are_pruned(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"entries": {"old": {"schema": None, "lastUsed": int(time.time()) - 90 * 86400}}}, f)
+        cache = SchemaCache(self.path, max_age_days=30)
+        cache.schema_for(api(0))
+        cache.save()
+
+        with open(self.path, encoding="utf-8") as f:
+            entries = json.load(f)["entries"]
+        self.assertNotIn("old", entries)
+        self.assertEqual(len(entries), 1)
+
+    def test_legacy_format_is_migrated(self):
+        key = SchemaCache.entry_hash(api(0))
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({key: {"type": "object", "properties": {}}}, f)
+        cache = SchemaCache(self.path)
+
+        self.assertEqual(cache.schema_for(api(0)), {"type": "object", "properties": {}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""分段計時連線的單元測試"""
+import socket
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_health_test import TimedHTTPAdapter  # noqa: E402
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+
+class TimedConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_falls_back_to_next_resolved_address(self):
+        real_getaddrinfo = socket.getaddrinfo
+
+        def fake_getaddrinfo(host, port, *args, **kwargs):
+            if host != "dual.test":
+                return real_getaddrinfo(host, port, *args, **kwargs)
+            # 第一個位址沒有服務在聽 (如不通的 IPv6)，第二個才是實際伺服器
+            return [
+                (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.2", port)),
+                (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port)),
+            ]
+
+        session = requests.Session()
+        session.mount("http://", TimedHTTPAdapter())
+        with mock.patch("socket.getaddrinfo", fake_getaddrinfo):
+            response = session.get(f"http://dual.test:{self.port}/", timeout=5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
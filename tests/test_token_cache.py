@@ -0,0 +1,46 @@
+"""Token 快取多行程寫入的單元測試"""
+import json
+import multiprocessing
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_health_test import TokenCache  # noqa: E402
+
+
+def write_entries(cache_path: str, worker: int, count: int, errors):
+    cache = TokenCache(cache_path)
+    for i in range(count):
+        try:
+            cache.put(f"worker-{worker}", {"accessToken": f"token-{i}", "expiresAt": None})
+        except Exception as e:
+            errors.put(repr(e))
+
+
+class TokenCacheTest(unittest.TestCase):
+
+    def test_concurrent_processes_write_without_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, ".token-cache.json")
+            errors = multiprocessing.Queue()
+            workers = [multiprocessing.Process(target=write_entries, args=(cache_path, i, 50, errors))
+                       for i in range(4)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+            self.assertTrue(errors.empty())
+            with open(cache_path, encoding="utf-8") as f:
+                self.assertIsInstance(json.load(f), dict)
+            self.assertEqual(stat.S_IMODE(os.stat(cache_path).st_mode), 0o600)
+            self.assertEqual([name for name in os.listdir(tmp) if name.endswith(".tmp")], [])
+
+
+if __name__ == "__main__":
+    unittest.main()